@@ -0,0 +1,83 @@
+"""Compares reading and writing gzip compressed files with the plain ones.
+
+Reading streams the decompressed blocks into the parser; it is compared with
+inflating the whole file first. Writing compresses the lines as they are
+produced; it is compared with compressing the result of ``write``.
+
+Run with ``python benchmarks/bench_gzip.py``.
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import parse
+from foamparser import parse_file
+from foamparser import write
+from foamparser import write_file
+
+
+def make_field(cells: int) -> str:
+    values = " ".join(f"{i}.25" for i in range(cells))
+    patches = "\n".join(
+        f"    patch{i} {{ type fixedValue; value uniform {i}; }}" for i in range(1000)
+    )
+    return (
+        "FoamFile { format ascii; class volScalarField; object p; }\n"
+        f"internalField nonuniform List<scalar> {cells}({values});\n"
+        f"boundaryField\n{{\n{patches}\n}}\n"
+    )
+
+
+def make_dict(entries: int):
+    return {
+        f"entry{i}": {"type": "fixedValue", "value": ["uniform", str(i)]}
+        for i in range(entries)
+    }
+
+
+def inflate_and_parse(path: str):
+    with gzip.open(path, "rt") as infile:
+        return parse(infile.read())
+
+
+def write_and_compress(path: str, input):
+    with open(path, "wb") as outfile:
+        outfile.write(gzip.compress(write(input).encode()))
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    plain = os.path.join(directory, "p")
+    compressed = plain + ".gz"
+    content = make_field(2_000_000)
+    with open(plain, "w") as outfile:
+        outfile.write(content)
+    with gzip.open(compressed, "wt") as outfile:
+        outfile.write(content)
+    print(f"field size: {len(content) / 1024 / 1024:.1f} MiB")
+
+    for name, func in [
+        ("plain", lambda: parse_file(plain)),
+        ("gzip, streamed", lambda: parse_file(compressed)),
+        ("gzip, inflated", lambda: inflate_and_parse(compressed)),
+    ]:
+        best = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"read {name:>15}: {best:.3f}s")
+
+    input = make_dict(100_000)
+    for name, func in [
+        ("plain", lambda: write_file(plain, input)),
+        ("gzip, streamed", lambda: write_file(compressed, input, compress=True)),
+        ("gzip, at once", lambda: write_and_compress(compressed, input)),
+    ]:
+        best = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"write {name:>14}: {best:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
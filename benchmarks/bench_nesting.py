@@ -0,0 +1,207 @@
+"""Compares the recursive dictionary/list processing (as it was) with the
+explicit stack one, on deep and wide inputs.
+
+Run with ``python benchmarks/bench_nesting.py``.
+"""
+
+import logging
+import os
+import sys
+import timeit
+
+from typing import Any
+from typing import Dict
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser.exceptions import UnexpectedCharacterError
+from foamparser.exceptions import UnexpectedTokenError
+from foamparser.parser import LIST_READERS
+from foamparser.parser import include_argument
+from foamparser.parser import proc_dict
+from foamparser.parser import token_value
+from foamparser.scanner import DICT_END
+from foamparser.scanner import DICT_START
+from foamparser.scanner import END
+from foamparser.scanner import IDENTIFIER
+from foamparser.scanner import INCLUDE
+from foamparser.scanner import LIST_END
+from foamparser.scanner import LIST_START
+from foamparser.scanner import NAMES
+from foamparser.scanner import QUOTED_STRING
+from foamparser.scanner import scan
+
+logger = logging.getLogger(__name__)
+
+
+def recursive_dict(
+    text: str, tokens, readers=LIST_READERS, include=None
+) -> Dict[str, Any]:
+    """``proc_dict``, as it was: each dictionary/list is a recursive call."""
+    result = {}
+    entry = None
+    values = []
+    decode = not isinstance(text, str)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # the ";" after an include is optional
+    after_include = False
+    for kind, start, end in tokens:
+        if debug:
+            logger.debug(
+                "[D] token=%s, value=%s (entry=%s)",
+                NAMES[kind],
+                token_value(text, start, end),
+                entry,
+            )
+        included, after_include = after_include, False
+
+        if kind == IDENTIFIER:
+            value = text[start:end]
+            if decode:
+                value = value.decode()
+            if entry is None:
+                entry = value
+            else:
+                values.append(value)
+        elif kind == END:
+            if entry is None:
+                if included:
+                    continue
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if len(values) == 1:
+                # this is just to make things prettier
+                result[entry] = values[0]
+            else:
+                result[entry] = values
+            entry = None
+            values = []
+        elif kind == QUOTED_STRING:
+            value = text[start + 1 : end - 1]
+            if decode:
+                value = value.decode()
+            if entry is None:
+                entry = value
+            else:
+                values.append(value)
+        elif kind == LIST_START:
+            if entry is None:
+                # To start a list, or dict, or to complete the values of
+                # something, we need to have started something already.
+                raise UnexpectedTokenError(token_value(text, start, end))
+            values.append(
+                recursive_typed_list(text, tokens, values, end, readers, include)
+            )
+        elif kind == DICT_START:
+            if entry is None:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            result[entry] = recursive_dict(text, tokens, readers, include)
+            values = []
+            entry = None
+        elif kind == DICT_END:
+            break
+        elif kind == LIST_END:
+            # we don't expect the end of a list while processing a dictionary
+            raise UnexpectedTokenError(token_value(text, start, end))
+        elif kind == INCLUDE:
+            directive, argument = include_argument(text, tokens, start, end)
+            if include is None:
+                if "#includes" not in result:
+                    result["#includes"] = []
+                result["#includes"].append(argument)
+            else:
+                include(result, directive, argument)
+            after_include = True
+
+    return result
+
+
+def recursive_typed_list(
+    text: str,
+    tokens,
+    values: List[Any],
+    start: int,
+    readers=LIST_READERS,
+    include=None,
+) -> Any:
+    """``proc_typed_list``, as it was."""
+    if len(values) >= 2 and isinstance(values[-2], str):
+        reader = readers.get(values[-2])
+        if reader is not None and isinstance(values[-1], str):
+            read = reader(text, start, values[-1])
+            if read is not None:
+                value, end = read
+                tokens.send(end)
+                return value
+    return recursive_list(text, tokens, readers, include)
+
+
+def recursive_list(text: str, tokens, readers=LIST_READERS, include=None) -> List[Any]:
+    """``proc_list``, as it was."""
+    result = []
+    decode = not isinstance(text, str)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for kind, start, end in tokens:
+        if debug:
+            logger.debug(
+                "[L] token=%s, value=%s", NAMES[kind], token_value(text, start, end)
+            )
+
+        if kind == IDENTIFIER:
+            value = text[start:end]
+            if decode:
+                value = value.decode()
+            result.append(value)
+        elif kind == LIST_END:
+            break
+        elif kind == LIST_START:
+            result.append(recursive_list(text, tokens, readers, include))
+        elif kind == DICT_START:
+            result.append(recursive_dict(text, tokens, readers, include))
+        elif kind == QUOTED_STRING:
+            value = text[start + 1 : end - 1]
+            if decode:
+                value = value.decode()
+            result.append(value)
+        elif kind in (DICT_END, END):
+            raise UnexpectedTokenError(token_value(text, start, end))
+        else:
+            raise UnexpectedCharacterError(token_value(text, start, end), start)
+    return result
+
+
+def make_deep(depth: int) -> str:
+    dicts = "a " + "{ a " * depth + "1;" + " }" * depth
+    lists = "b (" + "(" * depth + "1" + ")" * depth + ");"
+    return f"{dicts}\n{lists}"
+
+
+def make_wide(entries: int) -> str:
+    lines = []
+    for i in range(entries):
+        lines.append(
+            f"entry{i} {{ type fixedValue; value ( {i} ( 1 2 ) {{ x y; }} ); }}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    for name, text in [
+        ("wide (200000 entries)", make_wide(200_000)),
+        ("deep (500 levels)", make_deep(500)),
+        ("deep (20000 levels)", make_deep(20_000)),
+    ]:
+        print(name)
+        for label, func in [("recursive", recursive_dict), ("stack", proc_dict)]:
+            try:
+                best = min(
+                    timeit.repeat(lambda: func(text, scan(text)), number=1, repeat=3)
+                )
+            except RecursionError:
+                print(f"{label:>12}: RecursionError")
+                continue
+            print(f"{label:>12}: {best:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
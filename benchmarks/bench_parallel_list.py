@@ -0,0 +1,41 @@
+"""Compares converting a huge list in one process and in several.
+
+Run with ``python benchmarks/bench_parallel_list.py [cells]``.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import parse_file
+
+
+def make_field(path: str, cells: int):
+    with open(path, "w") as outfile:
+        outfile.write(f"internalField nonuniform List<vector> {cells}\n(\n")
+        for i in range(cells):
+            outfile.write(f"({i}.25 -{i}.5 1e-{i % 300})\n")
+        outfile.write(");\n")
+
+
+def main():
+    cells = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    path = os.path.join(tempfile.mkdtemp(), "U")
+    make_field(path, cells)
+    print(f"field size: {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+    for workers in sorted({1, 2, 4, os.cpu_count()}):
+        best = min(
+            timeit.repeat(
+                lambda: parse_file(path, tensors=True, workers=workers),
+                number=1,
+                repeat=3,
+            )
+        )
+        print(f"{workers:>3} workers: {best:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compares the sly based FoamLexer with the hand written scanner.
+
+Run with ``python benchmarks/bench_scanner.py``.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import parse
+from foamparser.scanner import scan
+from foamparser.tokenizer import FoamLexer
+
+
+def make_input(entries: int) -> str:
+    lines = ["/* generated input */"]
+    for i in range(entries):
+        lines.append(f"entry{i}")
+        lines.append("{")
+        lines.append(f'    name "entry number {i}";')
+        lines.append("    type fixedValue;")
+        lines.append(f"    value uniform {i}.5e-3;")
+        lines.append("    coeffs ( 1 2 3 4 5 6 7 8 );  // trailing comment")
+        lines.append("}")
+    return "\n".join(lines)
+
+
+def lex_sly(text: str):
+    for _token in FoamLexer().tokenize(text):
+        pass
+
+
+def lex_scanner(text: str):
+    for _token in scan(text):
+        pass
+
+
+def main():
+    text = make_input(20_000)
+    print(f"input size: {len(text) / 1024 / 1024:.1f} MiB")
+    for name, func in [
+        ("sly FoamLexer", lex_sly),
+        ("scanner", lex_scanner),
+        ("parse()", parse),
+    ]:
+        best = min(timeit.repeat(lambda: func(text), number=1, repeat=3))
+        print(f"{name:>15}: {best:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,8 @@
+from .parallel import parse_many
+from .parser import iterparse
+from .parser import iterparse_file
 from .parser import parse
+from .parser import parse_file
+from .parser import read_header
 from .writer import write
+from .writer import write_file
@@ -0,0 +1,365 @@
+"""Caches of parsed files.
+
+``FileCache`` keeps results in memory: files are re-parsed only when they
+change, as each cached result is validated against the file's modification
+time, size and inode before being used. The cache is bounded by the total
+size of the cached results (the bytes of their arrays and the lengths of
+their strings), evicting the least recently used ones first.
+Results are copied on read (arrays from NumPy are made read-only and shared
+instead), so callers can't corrupt the cached trees.
+
+``DiskCache`` keeps results in a directory, one file per parsed file: the
+numeric arrays are stored as ``.npy`` blocks, followed by the rest of the
+tree as JSON (with ``{"$array": index}`` in place of each array). Loading a
+cached result maps the cache file in memory, so the arrays are views over
+it instead of copies.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+import threading
+
+from array import array
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .numeric import is_array
+from .numeric import numpy
+from .numeric import shaped
+from .parser import map_file
+from .parser import parse_file as _parse_file
+
+
+logger = logging.getLogger(__name__)
+
+# Default bound for the total size of the cached results.
+MAX_BYTES = 64 * 1024 * 1024
+
+# Layout of the files of a ``DiskCache``: the magic, the ``.npy`` blocks and
+# the JSON index, followed by the offset of the index. Blocks are aligned,
+# so their data can be mapped as arrays.
+_MAGIC = b"FOAMCACHE\x01\n"
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_TRAILER = struct.Struct("<Q")
+_ALIGNMENT = 64
+_BYTE_ORDER = "<" if sys.byteorder == "little" else ">"
+_DESCRS = {"d": "f8", "f": "f4", "q": "i8", "i": "i4"}
+_TYPECODES = {descr: typecode for typecode, descr in _DESCRS.items()}
+# Size of the blocks read when hashing the contents of a file.
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+class FileCache:
+    """LRU cache of ``parse_file`` results, bounded by ``max_bytes``.
+
+    ``hits``, ``misses`` and ``evictions`` count what happened so far.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        # (path, options) -> (stat key, size, result), least recent first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse_file(
+        self,
+        path: str,
+        tensors: bool = False,
+        select: Optional[List[str]] = None,
+        workers: int = 1,
+    ) -> Dict[str, Any]:
+        """Parse a file (see ``foamparser.parse_file``), unless it is cached.
+
+        ``workers`` only changes how the file is parsed, so it isn't part of
+        what identifies a cached result.
+        """
+        info = os.stat(path)
+        stat_key = (info.st_mtime_ns, info.st_size, info.st_ino)
+        key = (
+            os.path.abspath(path),
+            tensors,
+            None if select is None else tuple(select),
+        )
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stat_key:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy_result(cached[2])
+            self.misses += 1
+
+        result = _parse_file(path, tensors=tensors, select=select, workers=workers)
+        freeze_result(result)
+
+        size = result_size(result)
+        with self._lock:
+            self._discard(key)
+            if size <= self.max_bytes:
+                self._entries[key] = (stat_key, size, result)
+                self._size += size
+                while self._size > self.max_bytes:
+                    _key, evicted = self._entries.popitem(last=False)
+                    self._size -= evicted[1]
+                    self.evictions += 1
+        return copy_result(result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _discard(self, key) -> None:
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._size -= cached[1]
+
+
+def result_size(value) -> int:
+    """The size of a result, in bytes: the data of its arrays and the
+    lengths of its keys and strings."""
+    if isinstance(value, dict):
+        return sum(len(key) + result_size(item) for key, item in value.items())
+    if isinstance(value, list):
+        return sum(result_size(item) for item in value)
+    if isinstance(value, array):
+        return len(value) * value.itemsize
+    if is_array(value):
+        return value.nbytes
+    if isinstance(value, str):
+        return len(value)
+    return 0
+
+
+def freeze_result(value) -> None:
+    """Make the NumPy arrays in a result read-only, so they can be shared."""
+    if isinstance(value, dict):
+        for item in value.values():
+            freeze_result(item)
+    elif isinstance(value, list):
+        for item in value:
+            freeze_result(item)
+    elif numpy is not None and isinstance(value, numpy.ndarray):
+        value.flags.writeable = False
+
+
+def copy_result(value):
+    """Copy a result, sharing only what can't be changed."""
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    if isinstance(value, array):
+        return value[:]
+    if isinstance(value, memoryview) and not value.readonly:
+        values = array(value.format, value.tobytes())
+        return shaped(values, value.shape[1]) if value.ndim > 1 else memoryview(values)
+    # strings, read-only arrays and views
+    return value
+
+
+cache = FileCache()
+
+
+def parse_file(
+    path: str, tensors: bool = False, select: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Parse a file through the module's shared cache."""
+    return cache.parse_file(path, tensors=tensors, select=select)
+
+
+class DiskCache:
+    """Cache of ``parse_file`` results in ``directory``, kept across runs.
+
+    With ``check="mtime"``, cached results are used while the file keeps its
+    modification time and size; with ``check="hash"``, while it keeps its
+    contents (which are read, but not parsed, to check it).
+
+    ``hits`` and ``misses`` count what happened so far.
+    """
+
+    def __init__(self, directory: str, check: str = "mtime"):
+        if check not in ("mtime", "hash"):
+            raise ValueError(f"Unknown check: {check}")
+        self.directory = directory
+        self.check = check
+        self.hits = 0
+        self.misses = 0
+
+    def parse_file(
+        self,
+        path: str,
+        tensors: bool = False,
+        select: Optional[List[str]] = None,
+        workers: int = 1,
+    ) -> Dict[str, Any]:
+        """Parse a file (see ``foamparser.parse_file``), unless it is cached.
+
+        ``workers`` only changes how the file is parsed, so it isn't part of
+        what identifies a cached result.
+        """
+        source = self._source(path)
+        options = (
+            os.path.abspath(path),
+            tensors,
+            None if select is None else list(select),
+        )
+        name = hashlib.sha1(json.dumps(options).encode()).hexdigest()
+        entry = os.path.join(self.directory, name + ".foamcache")
+
+        result = None
+        if os.path.exists(entry):
+            try:
+                result = load_result(entry, source)
+            except (OSError, ValueError, KeyError, TypeError, struct.error):
+                logger.warning("Ignoring invalid cache file %s", entry)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = _parse_file(path, tensors=tensors, select=select, workers=workers)
+        try:
+            store_result(entry, result, source)
+        except OSError as error:
+            logger.warning("Can't write cache file %s: %s", entry, error)
+        return result
+
+    def _source(self, path: str):
+        """What identifies the current version of the file."""
+        if self.check == "mtime":
+            info = os.stat(path)
+            return [info.st_mtime_ns, info.st_size]
+        digest = hashlib.blake2b()
+        with open(path, "rb") as infile:
+            for block in iter(lambda: infile.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+def store_result(entry: str, result: Dict[str, Any], source=None) -> None:
+    """Write a result into ``entry``, in the format of the cache files.
+
+    ``source`` identifies the version of the file that was parsed.
+    """
+    arrays = []
+    tree = _skeleton(result, arrays)
+    directory = os.path.dirname(entry)
+    os.makedirs(directory, exist_ok=True)
+
+    # written to a temporary file and renamed, so readers never see a
+    # partial entry (and results mapped from the old one stay valid)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as outfile:
+        try:
+            outfile.write(_MAGIC)
+            _pad(outfile)
+            blocks = []
+            for value in arrays:
+                descr, shape, data = _array_data(value)
+                outfile.write(npy_header(descr, shape))
+                blocks.append([outfile.tell(), descr, shape])
+                outfile.write(data)
+                _pad(outfile)
+            index = outfile.tell()
+            outfile.write(
+                json.dumps({"source": source, "tree": tree, "arrays": blocks})
+                .encode()
+            )
+            outfile.write(_TRAILER.pack(index))
+        except BaseException:
+            os.unlink(outfile.name)
+            raise
+    os.replace(outfile.name, entry)
+
+
+def load_result(entry: str, source=None) -> Optional[Dict[str, Any]]:
+    """Map a result written by ``store_result``, if it has the same source."""
+    data = map_file(entry)
+    if data[: len(_MAGIC)] != _MAGIC:
+        raise ValueError("Not a cache file")
+    (index,) = _TRAILER.unpack(data[-_TRAILER.size :])
+    index = json.loads(data[index : -_TRAILER.size])
+    if index["source"] != source:
+        return None
+    arrays = [_load_array(data, *block) for block in index["arrays"]]
+    return _tree(index["tree"], arrays)
+
+
+def _skeleton(value, arrays: List[Any]):
+    """Replace the arrays in a result with references to ``arrays``."""
+    if isinstance(value, dict):
+        return {key: _skeleton(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_skeleton(item, arrays) for item in value]
+    if is_array(value):
+        arrays.append(value)
+        return {"$array": len(arrays) - 1}
+    return value
+
+
+def _tree(value, arrays: List[Any]):
+    """The other way around of ``_skeleton``."""
+    if isinstance(value, dict):
+        # parsed values are never numbers, so this can't be a real entry
+        if len(value) == 1 and isinstance(value.get("$array"), int):
+            return arrays[value["$array"]]
+        return {key: _tree(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_tree(item, arrays) for item in value]
+    return value
+
+
+def _array_data(value):
+    """The ``.npy`` description, shape and contents of an array."""
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        return value.dtype.str, list(value.shape), numpy.ascontiguousarray(value)
+    view = memoryview(value)
+    return _BYTE_ORDER + _DESCRS[view.format], list(view.shape), view
+
+
+def npy_header(descr: str, shape: List[int]) -> bytes:
+    """The header of a ``.npy`` file (version 1.0) for an array."""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (
+        descr,
+        tuple(shape),
+    )
+    # the header ends with a newline, and pads the data to the alignment
+    padding = -(len(_NPY_MAGIC) + 2 + len(header) + 1) % _ALIGNMENT
+    header = (header + " " * padding + "\n").encode("latin1")
+    return _NPY_MAGIC + struct.pack("<H", len(header)) + header
+
+
+def _pad(outfile) -> None:
+    outfile.write(b"\0" * (-outfile.tell() % _ALIGNMENT))
+
+
+def _load_array(data, offset: int, descr: str, shape: List[int]):
+    count = 1
+    for size in shape:
+        count *= size
+    if numpy is not None:
+        values = numpy.frombuffer(data, dtype=descr, count=count, offset=offset)
+        return values.reshape(shape)
+
+    typecode = _TYPECODES[descr[1:]]
+    end = offset + count * array(typecode).itemsize
+    if descr[0] != _BYTE_ORDER:
+        values = array(typecode, data[offset:end])
+        values.byteswap()
+    else:
+        values = memoryview(data)[offset:end].cast(typecode)
+    if len(shape) > 1:
+        return shaped(values, shape[1])
+    return values
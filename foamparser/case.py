@@ -0,0 +1,446 @@
+"""Readers for OpenFOAM case directories.
+
+``Case`` lists the time directories of a case and the fields in each one,
+reading only their ``FoamFile`` headers; the fields themselves are only
+parsed when they're accessed. ``Case.stack`` puts a field at every time in
+a ``.npy`` file, one time at a time.
+
+Decomposed cases have a ``processorN`` directory per piece of the domain,
+each with its own mesh and fields, and ``cellProcAddressing`` and
+``faceProcAddressing`` files mapping the local cells and faces to the ones
+of the whole mesh. ``reconstruct_field`` reads the pieces of a field in
+parallel and scatters each one straight into the array of the whole field.
+"""
+
+import os
+import re
+import sys
+
+from array import array
+from collections.abc import Mapping
+from functools import partial
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from . import mesh
+from .cache import npy_header
+from .exceptions import FoamError
+from .numeric import numpy
+from .numeric import shaped
+from .parallel import Parsed
+from .parallel import parse_many
+from .parser import map_file
+from .parser import parse_file
+from .parser import read_header
+
+
+_PROCESSOR = re.compile(r"processor(\d+)")
+_TIME = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+
+# Number of components of each type of field.
+_WIDTHS = {
+    "Scalar": 1,
+    "Vector": 3,
+    "SymmTensor": 6,
+    "Tensor": 9,
+    "SphericalTensor": 1,
+}
+_FIELD_CLASS = re.compile(r"(vol|surface)(\w+)Field")
+
+
+class Case:
+    """An OpenFOAM case, with its time directories and their fields.
+
+    ``case[time]`` gives the fields at a time directory, by name (see
+    ``TimeDirectory``). Directories are listed and headers are read only
+    once, when first needed.
+    """
+
+    def __init__(self, path: str, tensors: bool = True):
+        self.path = path
+        self.tensors = tensors
+        self._times = None
+        # the same names, to look them up
+        self._time_names = set()
+        self._directories = {}
+
+    @property
+    def times(self) -> List[str]:
+        """The names of the time directories, ordered by time."""
+        if self._times is None:
+            found = []
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if _TIME.fullmatch(entry.name) and entry.is_dir():
+                        found.append((float(entry.name), entry.name))
+            self._times = [name for _time, name in sorted(found)]
+            self._time_names = set(self._times)
+        return self._times
+
+    def __getitem__(self, time: str) -> "TimeDirectory":
+        if time not in self._directories:
+            self.times  # listed, if they weren't yet
+            if time not in self._time_names:
+                raise KeyError(time)
+            self._directories[time] = TimeDirectory(
+                os.path.join(self.path, time), self.tensors
+            )
+        return self._directories[time]
+
+    def field_times(self, name: str) -> List[str]:
+        """The times with the field ``name``."""
+        return [time for time in self.times if name in self[time]]
+
+    def stack(
+        self,
+        name: str,
+        path: str,
+        times: Optional[Iterable[str]] = None,
+        workers: Optional[int] = None,
+        cells: Optional[int] = None,
+    ):
+        """Stack the internal field ``name`` at ``times`` (by default, every
+        time with it) into a ``.npy`` file at ``path``.
+
+        The result is a ``(times, cells)`` array (``(times, cells, width)``
+        for vectors and tensors) mapped from the file; only one time is ever
+        held in memory, besides what's mapped. With ``workers``, the times
+        are parsed in that many processes (see ``parse_many``), each only a
+        few times ahead of the row being written.
+
+        The number of cells comes from the first ``nonuniform`` field; if
+        all of them are ``uniform``, it must be given as ``cells``.
+        """
+        times = self.field_times(name) if times is None else list(times)
+        files = [self[time].filename(name) for time in times]
+        if not files:
+            raise ValueError(f"No times with {name}")
+        _surface, width = _field_type(self[times[0]].headers[name])
+
+        reader = partial(parse_file, tensors=True, select=["internalField"])
+        if workers is None or workers <= 1:
+            parsed = (Parsed(file, reader(file), None) for file in files)
+        else:
+            parsed = parse_many(files, workers, reader=reader)
+
+        output = None
+        uniform = []
+        for row, piece in enumerate(parsed):
+            value = _result(piece)["internalField"]
+            if output is None and cells is None and value[0] == "uniform":
+                # written once the number of cells is known
+                uniform.append((row, value))
+                continue
+            if output is None:
+                if cells is None:
+                    cells = len(value[-1])
+                shape = [len(files), cells] + ([width] if width > 1 else [])
+                output = _StackWriter(path, shape)
+                for uniform_row, uniform_value in uniform:
+                    output.write(uniform_row, _values(uniform_value, cells, width))
+            output.write(row, _values(value, cells, width))
+
+        if output is None:
+            raise ValueError(f"All the {name} fields are uniform, cells is needed")
+        return output.close()
+
+    def reload(self) -> None:
+        """Forget what was listed and read, to see new times and fields."""
+        self._times = None
+        self._time_names = set()
+        self._directories = {}
+
+
+class TimeDirectory(Mapping):
+    """The fields of a time directory, by name.
+
+    The files are indexed by their ``FoamFile`` header (see ``headers``);
+    each field is parsed lazily (see ``foamparser.lazy``) when accessed, and
+    kept.
+    """
+
+    def __init__(self, path: str, tensors: bool = True):
+        self.path = path
+        self.tensors = tensors
+        self._headers = None
+        self._files = {}
+        self._values = {}
+
+    @property
+    def headers(self) -> Dict[str, Dict[str, Any]]:
+        """The headers of the files in the directory, by field name.
+
+        Files without a header, or that aren't Foam files at all, are left
+        out.
+        """
+        if self._headers is None:
+            headers = {}
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    try:
+                        header = read_header(entry.path)
+                    except (FoamError, UnicodeDecodeError):
+                        continue
+                    if not header:
+                        continue
+                    name = entry.name
+                    if name.endswith(".gz"):
+                        name = name[: -len(".gz")]
+                    headers[name] = header
+                    self._files[name] = entry.path
+            self._headers = headers
+        return self._headers
+
+    def __getitem__(self, name: str):
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        if name not in self.headers:
+            raise KeyError(name)
+        value = parse_file(self._files[name], tensors=self.tensors, lazy=True)
+        self._values[name] = value
+        return value
+
+    def __contains__(self, name) -> bool:
+        return name in self.headers
+
+    def filename(self, name: str) -> str:
+        """The path of the file of a field."""
+        if name not in self.headers:
+            raise KeyError(name)
+        return self._files[name]
+
+    def __iter__(self):
+        return iter(self.headers)
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+
+def processor_dirs(case: str) -> List[str]:
+    """The ``processorN`` directories of a case, ordered by number."""
+    found = []
+    with os.scandir(case) as entries:
+        for entry in entries:
+            match = _PROCESSOR.fullmatch(entry.name)
+            if match is not None and entry.is_dir():
+                found.append((int(match.group(1)), entry.path))
+    return [path for _number, path in sorted(found)]
+
+
+def reconstruct_field(
+    case: str, time: str, field: str, workers: Optional[int] = None
+) -> Any:
+    """Reconstruct the internal field of a decomposed case.
+
+    The pieces are read in ``workers`` processes (see ``parse_many``) and
+    scattered into the resulting array: ``(N,)`` for scalars, ``(N, width)``
+    for vectors and tensors, over the cells of the whole mesh for ``vol``
+    fields and over its internal faces for ``surface`` ones (with the faces
+    on processor patches coming from those patches). The faces of
+    ``surfaceScalarField`` (fluxes, like ``phi``) change sign where the
+    piece has them the other way around.
+    """
+    processors = processor_dirs(case)
+    if not processors:
+        raise FileNotFoundError(f"No processor directories in {case}")
+    fields = [mesh.mesh_file(os.path.join(path, time), field) for path in processors]
+    header = read_header(fields[0])
+    surface, width = _field_type(header)
+    flip = header["class"] == "surfaceScalarField"
+
+    paths = []
+    for path in processors:
+        polymesh = os.path.join(path, "constant", "polyMesh")
+        if surface:
+            paths.append(mesh.mesh_file(polymesh, "faceProcAddressing"))
+            paths.append(mesh.mesh_file(polymesh, "boundary"))
+        else:
+            paths.append(mesh.mesh_file(polymesh, "cellProcAddressing"))
+    pieces = parse_many(paths + fields, workers, reader=_read_piece)
+
+    # the addressing comes first, so the result can be allocated before the
+    # fields come in
+    addressing = []
+    for path in processors:
+        if surface:
+            faces = _result(next(pieces))
+            boundary = _result(next(pieces))
+            addressing.append(_face_ranges(faces, boundary))
+        else:
+            cells = _result(next(pieces))
+            addressing.append([(None, _indices(cells, 0, len(cells)), None)])
+    size = max(
+        (_max(indices) + 1 for ranges in addressing for _p, indices, _f in ranges),
+        default=0,
+    )
+    if numpy is not None:
+        result = numpy.zeros((size, width) if width > 1 else size)
+    else:
+        result = array("d", bytes(8 * size * width))
+
+    for ranges in addressing:
+        values = _result(next(pieces))
+        for patch, indices, flipped in ranges:
+            if patch is None:
+                value = values["internalField"]
+            else:
+                value = values["boundaryField"][patch]["value"]
+            _scatter(
+                result,
+                width,
+                indices,
+                _values(value, len(indices), width),
+                flipped if flip else None,
+            )
+
+    if numpy is None and width > 1:
+        return shaped(result, width)
+    return result
+
+
+def _field_type(header: Dict[str, Any]):
+    """If the field in a header is a ``surface`` one, and its width."""
+    match = _FIELD_CLASS.fullmatch(header.get("class", ""))
+    if match is None or match.group(2) not in _WIDTHS:
+        raise ValueError(f"Not a vol or surface field: {header.get('class')}")
+    return match.group(1) == "surface", _WIDTHS[match.group(2)]
+
+
+class _StackWriter:
+    """Writes the rows of a ``float64`` array with ``shape`` into a ``.npy``
+    file, mapping it with NumPy if available."""
+
+    def __init__(self, path: str, shape: List[int]):
+        self.path = path
+        self.shape = shape
+        self.row_size = 1
+        for size in shape[1:]:
+            self.row_size *= size
+        if numpy is not None:
+            self.array = numpy.lib.format.open_memmap(
+                path, mode="w+", dtype="float64", shape=tuple(shape)
+            )
+            return
+
+        header = npy_header("<f8" if sys.byteorder == "little" else ">f8", shape)
+        self.offset = len(header)
+        self.outfile = open(path, "wb")
+        self.outfile.write(header)
+        self.outfile.truncate(self.offset + 8 * shape[0] * self.row_size)
+
+    def write(self, row: int, values) -> None:
+        if numpy is not None:
+            self.array[row] = values
+            return
+        if len(values) != self.row_size:
+            raise ValueError(f"Expected {self.row_size} values, got {len(values)}")
+        self.outfile.seek(self.offset + 8 * row * self.row_size)
+        self.outfile.write(array("d", values))
+
+    def close(self):
+        """Finish the file, returning the array mapped from it."""
+        if numpy is not None:
+            self.array.flush()
+            return self.array
+        self.outfile.close()
+        view = memoryview(map_file(self.path))[self.offset :]
+        return view.cast("d", self.shape)
+
+
+def _read_piece(path: str):
+    """Read one of the files of a processor directory."""
+    if os.path.basename(os.path.dirname(path)) != "polyMesh":
+        return parse_file(path, tensors=True)
+    if os.path.basename(path).startswith("boundary"):
+        return mesh.read_boundary(path)
+    return mesh.read_labels(path)
+
+
+def _result(parsed):
+    if parsed.error is not None:
+        raise parsed.error
+    return parsed.result
+
+
+def _face_ranges(faces, boundary):
+    """The global faces of the internal faces of a piece, and of each of its
+    processor patches, as ``(patch, faces, flipped)``.
+
+    In ``faceProcAddressing``, faces are numbered from 1, and negative
+    numbers mark faces that are the other way around in the whole mesh.
+    """
+    starts = [int(patch["startFace"]) for patch in boundary.values()]
+    ranges = [(None, 0, min(starts, default=len(faces)))]
+    for name, patch in boundary.items():
+        if patch.get("type") == "processor":
+            start = int(patch["startFace"])
+            ranges.append((name, start, start + int(patch["nFaces"])))
+
+    result = []
+    for name, start, stop in ranges:
+        labels = faces[start:stop]
+        if numpy is not None:
+            labels = numpy.asarray(labels)
+            result.append((name, numpy.abs(labels) - 1, labels < 0))
+        else:
+            result.append(
+                (
+                    name,
+                    array("q", (abs(label) - 1 for label in labels)),
+                    [label < 0 for label in labels],
+                )
+            )
+    return result
+
+
+def _indices(labels, start: int, stop: int):
+    if numpy is not None:
+        return numpy.asarray(labels[start:stop])
+    return labels[start:stop]
+
+
+def _max(indices) -> int:
+    if not len(indices):
+        return -1
+    return int(max(indices))
+
+
+def _values(value, count: int, width: int):
+    """The values of a field (``uniform`` or ``nonuniform``), flat when
+    there's no NumPy."""
+    if value[0] == "uniform":
+        uniform = value[1] if isinstance(value[1], list) else [value[1]]
+        uniform = [float(item) for item in uniform]
+        if numpy is not None:
+            return numpy.full((count, width) if width > 1 else count, uniform)
+        return array("d", uniform * count)
+
+    values = value[-1]
+    if numpy is not None:
+        return numpy.asarray(values, dtype=float)
+    if isinstance(values, memoryview) and values.ndim > 1:
+        return values.cast("B").cast(values.format)
+    return values
+
+
+def _scatter(result, width: int, indices, values, flipped=None) -> None:
+    if numpy is not None:
+        if flipped is not None:
+            values = numpy.where(flipped, -values, values)
+        result[indices] = values
+        return
+
+    for i, index in enumerate(indices):
+        if flipped is not None and flipped[i]:
+            result[index] = -values[i]
+        else:
+            result[index * width : (index + 1) * width] = array(
+                "d", values[i * width : (i + 1) * width]
+            )
@@ -0,0 +1,350 @@
+"""Lossless editing of Foam contents.
+
+A ``Document`` keeps the content as it is, with the span of each entry (at
+every level of dictionaries) and of each comment, instead of a parsed result.
+Setting a value only records it; ``dumps`` gives back the content with the
+spans of the changed entries replaced (and new entries added after the last
+entry of their dictionary), so comments, the banner, formatting and includes
+are kept, and only what changed is rendered.
+
+Values are written like this:
+
+- strings as they are, in Foam syntax (``"uniform (1 0 0)"``; quotes, if
+  needed, are part of the string);
+- tuples as several values (``("uniform", [1, 0, 0])``);
+- lists as lists (``[1, 0, 0]`` is ``(1 0 0)``);
+- dictionaries as dictionaries;
+- anything else (numbers, arrays) like ``write`` does.
+"""
+
+import bisect
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+
+from .exceptions import UnexpectedTokenError
+from .numeric import is_array
+from .parser import file_readers
+from .parser import include_argument
+from .parser import proc_dict
+from .parser import proc_header
+from .parser import read_contents
+from .parser import skip_list
+from .parser import token_value
+from .scanner import COMMENT
+from .scanner import DICT_END
+from .scanner import DICT_START
+from .scanner import END
+from .scanner import IDENTIFIER
+from .scanner import INCLUDE
+from .scanner import LIST_END
+from .scanner import LIST_START
+from .scanner import QUOTED_STRING
+from .scanner import scan
+from .writer import array_value
+from .writer import safe_value
+from .writer import spacing
+
+
+class Span(NamedTuple):
+    """Where an entry is: from its name, from its value and its end (right
+    after its ";", or after the "}" of dictionaries)."""
+
+    start: int
+    value: int
+    end: int
+
+
+def parse_cst(input: str) -> "Document":
+    """Parse a Foam content for editing."""
+    return Document(input)
+
+
+def parse_cst_file(path: str) -> "Document":
+    """Parse a Foam file for editing; the document is over its bytes (gzip
+    compressed files are decompressed)."""
+    return Document(bytes(read_contents(path)))
+
+
+class Document:
+    """A Foam content, with the spans of its entries.
+
+    Key paths are tuples of keys or strings like ``"boundaryField/inlet"``.
+    ``spans`` has the ``Span`` of each entry, by key path (as tuple), and
+    ``comments`` the ``(start, end)`` of each comment.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        header = proc_header(text)
+        self._binary = header.get("format") == "binary"
+        self._readers = file_readers(header)
+        self.spans: Dict[Tuple[str, ...], Span] = {}
+        self.comments: List[Tuple[int, int]] = []
+        # for each dictionary, the position of its "{" and where its last
+        # entry starts and ends (None if it has no entries)
+        self._dicts = {(): [None, None, None]}
+        self._values = {}
+        self._skim()
+
+    def __getitem__(self, path):
+        """The value at a key path (with the values set in it)."""
+        path = _path(path)
+        for size in range(len(path), 0, -1):
+            if path[:size] in self._values:
+                value = self._values[path[:size]]
+                for key in path[size:]:
+                    if not isinstance(value, dict):
+                        raise KeyError("/".join(path))
+                    value = value[key]
+                return value
+
+        span = self.spans.get(path)
+        if span is None:
+            raise KeyError("/".join(path))
+        tokens = scan(self.text, span.start, stop=span.end)
+        result = proc_dict(self.text, tokens, self._readers)
+        for other, value in self._values.items():
+            if other[: len(path)] == path:
+                _set(result, other[len(path) - 1 :], value)
+        return result[path[-1]]
+
+    def __setitem__(self, path, value) -> None:
+        self.set(path, value)
+
+    def set(self, path, value: Any) -> None:
+        """Set the value at a key path, adding the entry (and the
+        dictionaries to it) if it doesn't exist.
+
+        Going through an entry that isn't a dictionary replaces it by one.
+        """
+        path = _path(path)
+        for size in range(len(path) - 1, 0, -1):
+            if path[:size] in self._values:
+                # inside a value that was set
+                _set(self._values, (path[:size],) + path[size:], value)
+                return
+
+        # the deepest dictionary (of the content) on the way
+        size = len(path) - 1
+        while size > 0 and path[:size] not in self._dicts:
+            size -= 1
+        for key in reversed(path[size + 1 :]):
+            value = {key: value}
+        target = path[: size + 1]
+        for other in list(self._values):
+            if other[: len(target)] == target:
+                del self._values[other]
+        self._values[target] = value
+
+    def dumps(self):
+        """The content, with the values that were set (as ``str`` or
+        ``bytes``, like the content the document was created with)."""
+        changes = []
+        added = {}
+        for path, value in self._values.items():
+            span = self.spans.get(path)
+            if span is not None:
+                text = _value(value, self._indent(span.start))
+                if self.text[span.value - 1 : span.value].strip():
+                    text = " " + text
+                changes.append((span.value, span.end, text))
+            else:
+                added.setdefault(path[:-1], []).append((path[-1], value))
+
+        for parent, entries in added.items():
+            opening, last, last_end = self._dicts[parent]
+            if last is not None:
+                indent = self._indent(last)
+                position = self._line_end(last_end)
+                after = ""
+            elif opening is not None:
+                outer = self._indent(self.spans[parent].start)
+                indent = outer + spacing(1)
+                position = opening + 1
+                after = "\n" + outer
+            else:
+                indent = ""
+                position = len(self.text)
+                after = "\n"
+            text = "".join(
+                "\n" + indent + _entry(key, value, indent) for key, value in entries
+            )
+            if position == 0:
+                text = text[1:]
+            changes.append((position, position, text + after))
+
+        changes.sort(key=lambda change: change[:2])
+        pieces = []
+        position = 0
+        for start, end, text in changes:
+            pieces.append(self.text[position:start])
+            pieces.append(text if isinstance(self.text, str) else text.encode())
+            position = end
+        pieces.append(self.text[position:])
+        return pieces[0][:0].join(pieces)
+
+    def write(self, path: str) -> None:
+        """Write the content, with the values that were set, to a file."""
+        content = self.dumps()
+        with open(path, "w" if isinstance(content, str) else "wb") as outfile:
+            outfile.write(content)
+
+    def _line_end(self, position: int) -> int:
+        """Skip the comment right after ``position`` in the same line, if
+        there's one (so it stays with the entry before it)."""
+        index = bisect.bisect_left(self.comments, (position,))
+        if index < len(self.comments):
+            start, end = self.comments[index]
+            between = self.text[position:start]
+            newline = "\n" if isinstance(between, str) else b"\n"
+            if not between.strip() and newline not in between:
+                return end
+        return position
+
+    def _indent(self, position: int) -> str:
+        """The indentation of the line where ``position`` is."""
+        text = self.text
+        newline = "\n" if isinstance(text, str) else b"\n"
+        indent = text[text.rfind(newline, 0, position) + 1 : position]
+        if not isinstance(indent, str):
+            indent = indent.decode()
+        if indent.strip():
+            # something else before it in the line
+            return indent[: len(indent) - len(indent.lstrip())]
+        return indent
+
+    def _skim(self) -> None:
+        """Record the spans of the entries and comments."""
+        text = self.text
+        tokens = scan(text, comments=True)
+        # the enclosing dictionaries, as ``(path, entry, entry_start, value)``
+        stack = []
+        path = ()
+        entry = None
+        entry_start = value_start = 0
+        previous = last = None
+        after_include = False
+        for kind, start, end in tokens:
+            if kind == COMMENT:
+                self.comments.append((start, end))
+                continue
+            included, after_include = after_include, False
+
+            if kind == IDENTIFIER or kind == QUOTED_STRING:
+                if kind == QUOTED_STRING:
+                    value = token_value(text, start + 1, end - 1)
+                else:
+                    value = token_value(text, start, end)
+                if entry is None:
+                    entry = value
+                    entry_start = start
+                    value_start = None
+                    previous = last = None
+                else:
+                    if value_start is None:
+                        value_start = start
+                    previous, last = last, value
+            elif kind == END:
+                if entry is None:
+                    if included:
+                        continue
+                    raise UnexpectedTokenError(token_value(text, start, end))
+                if value_start is None:
+                    value_start = start
+                self._entry(path, entry, Span(entry_start, value_start, end))
+                entry = None
+            elif kind == LIST_START:
+                if entry is None:
+                    raise UnexpectedTokenError(token_value(text, start, end))
+                if value_start is None:
+                    value_start = start
+                position = skip_list(
+                    text, end, previous, last, self._readers, self._binary
+                )
+                tokens.send(position)
+                previous, last = last, None
+            elif kind == DICT_START:
+                if entry is None:
+                    raise UnexpectedTokenError(token_value(text, start, end))
+                if value_start is None:
+                    value_start = start
+                stack.append((path, entry, entry_start, value_start))
+                path = path + (entry,)
+                self._dicts[path] = [start, None, None]
+                entry = None
+            elif kind == DICT_END:
+                if not stack:
+                    break
+                path, name, entry_start, value_start = stack.pop()
+                self._entry(path, name, Span(entry_start, value_start, end))
+                entry = None
+            elif kind == LIST_END:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            elif kind == INCLUDE:
+                include_argument(text, tokens, start, end)
+                after_include = True
+
+    def _entry(self, path, name: str, span: Span) -> None:
+        self.spans[path + (name,)] = span
+        info = self._dicts[path]
+        info[1] = span.start
+        info[2] = span.end
+
+
+def _path(path) -> Tuple[str, ...]:
+    if isinstance(path, str):
+        return tuple(key for key in path.split("/") if key)
+    return tuple(path)
+
+
+def _set(node: Dict[Any, Any], keys, value: Any) -> None:
+    """Set a value in nested dictionaries, replacing anything that isn't a
+    dictionary on the way."""
+    for key in keys[:-1]:
+        if not isinstance(node.get(key), dict):
+            node[key] = {}
+        node = node[key]
+    node[keys[-1]] = value
+
+
+def _entry(key: str, value: Any, indent: str) -> str:
+    """An entry, as text (starting at its name, in a line with ``indent``).
+
+    Names are quoted when needed, like ``write`` does.
+    """
+    key = safe_value(key)
+    if isinstance(value, dict):
+        return f"{key}\n{indent}{_value(value, indent)}"
+    return f"{key} {_value(value, indent)}"
+
+
+def _value(value: Any, indent: str) -> str:
+    """The value of an entry, with its end (";" or "}")."""
+    if isinstance(value, dict):
+        inner = indent + spacing(1)
+        entries = "".join(
+            "\n" + inner + _entry(key, item, inner) for key, item in value.items()
+        )
+        return f"{{{entries}\n{indent}}}"
+    return _values(value) + ";"
+
+
+def _values(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, tuple):
+        return " ".join(_values(item) for item in value)
+    if isinstance(value, list):
+        return "(" + " ".join(_values(item) for item in value) + ")"
+    if isinstance(value, dict):
+        entries = " ".join(
+            f"{safe_value(key)} {_values(item)};" for key, item in value.items()
+        )
+        return f"{{ {entries} }}"
+    if is_array(value):
+        return array_value(value)
+    return str(value)
@@ -15,3 +15,28 @@ class UnexpectedTokenError(FoamError):
 
 class InvalidRootElementError(FoamError):
     pass
+
+
+class InvalidListError(FoamError):
+    def __init__(self, position):
+        self.position = position
+
+
+class IncludeNotFoundError(FoamError):
+    def __init__(self, filename):
+        self.filename = filename
+
+
+class IncludeCycleError(FoamError):
+    def __init__(self, chain):
+        self.chain = chain
+
+
+class UndefinedVariableError(FoamError):
+    def __init__(self, name):
+        self.name = name
+
+
+class VariableCycleError(FoamError):
+    def __init__(self, name):
+        self.name = name
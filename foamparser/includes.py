@@ -0,0 +1,196 @@
+"""Resolution of ``#include`` directives.
+
+An ``IncludeResolver`` parses files replacing each include with the entries
+of the included file, at the point of the include (so later entries still
+override them), like OpenFOAM does:
+
+- ``#include "file"``: relative to the including file;
+- ``#includeIfPresent "file"``: the same, ignored if the file doesn't exist;
+- ``#includeEtc "file"``: searched in the OpenFOAM ``etc`` directories;
+- ``#includeFunc name(key=value, ...)``: the function object template
+  ``name``, searched in the directory of the including file and in
+  ``caseDicts/postProcessing`` of the ``etc`` directories, as an entry
+  named after the function, with the arguments as entries.
+
+Each file is parsed once per resolver, no matter how many files include it.
+"""
+
+import os
+
+from functools import partial
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from .cache import copy_result
+from .cache import freeze_result
+from .exceptions import IncludeCycleError
+from .exceptions import IncludeNotFoundError
+from .parser import file_readers
+from .parser import parse
+from .parser import proc_dict
+from .parser import proc_header
+from .parser import read_contents
+from .scanner import scan
+
+
+def etc_dirs() -> List[str]:
+    """The OpenFOAM ``etc`` directories, from the user's to the installation's."""
+    directories = [os.path.expanduser(os.path.join("~", ".OpenFOAM"))]
+    if "WM_PROJECT_SITE" in os.environ:
+        directories.append(os.environ["WM_PROJECT_SITE"])
+    if "FOAM_ETC" in os.environ:
+        directories.append(os.environ["FOAM_ETC"])
+    elif "WM_PROJECT_DIR" in os.environ:
+        directories.append(os.path.join(os.environ["WM_PROJECT_DIR"], "etc"))
+    return directories
+
+
+class IncludeResolver:
+    """Parse files, resolving their includes.
+
+    ``etc`` are the directories searched by ``#includeEtc`` (by default, the
+    ones in ``etc_dirs``). ``parsed`` counts the files parsed so far.
+    """
+
+    def __init__(self, etc: Optional[Iterable[str]] = None, tensors: bool = False):
+        self.etc = etc_dirs() if etc is None else list(etc)
+        self.tensors = tensors
+        self.parsed = 0
+        self._results = {}
+        self._functions = {}
+        # the files being parsed, to detect cycles
+        self._stack = []
+
+    def parse_file(self, path: str) -> Dict[str, Any]:
+        """Parse a file, with its includes (and theirs) resolved."""
+        return copy_result(self._parse(os.path.abspath(path)))
+
+    def _parse(self, path: str) -> Dict[str, Any]:
+        result = self._results.get(path)
+        if result is not None:
+            return result
+        if path in self._stack:
+            raise IncludeCycleError(self._stack[self._stack.index(path) :] + [path])
+
+        self._stack.append(path)
+        try:
+            data = read_contents(path)
+            readers = file_readers(proc_header(data), self.tensors)
+            include = partial(self._include, os.path.dirname(path))
+            result = proc_dict(data, scan(data), readers, include)
+        finally:
+            self._stack.pop()
+        freeze_result(result)
+        self._results[path] = result
+        self.parsed += 1
+        return result
+
+    def _include(
+        self, directory: str, result: Dict[str, Any], directive: str, argument: str
+    ) -> None:
+        if directive == "#includeFunc":
+            name, entry = self._function(directory, argument)
+            result[name] = entry
+            return
+
+        filename = os.path.expandvars(_unquote(argument))
+        if directive == "#includeEtc":
+            path = _find(self.etc, filename)
+        else:
+            path = os.path.join(directory, filename)
+            if not os.path.isfile(path):
+                path = None
+        if path is None:
+            if directive == "#includeIfPresent":
+                return
+            raise IncludeNotFoundError(filename)
+
+        for key, value in self._parse(os.path.abspath(path)).items():
+            if key != "FoamFile":
+                result[key] = copy_result(value)
+
+    def _function(self, directory: str, argument: str):
+        """The entry of an ``#includeFunc``, and its name."""
+        name, _paren, arguments = _unquote(argument).partition("(")
+        path = _find([directory], name)
+        if path is None:
+            path = self._find_function(name)
+        if path is None:
+            raise IncludeNotFoundError(name)
+
+        entry = {
+            key: copy_result(value)
+            for key, value in self._parse(os.path.abspath(path)).items()
+            if key != "FoamFile"
+        }
+        entry.update(_function_arguments(arguments.rpartition(")")[0]))
+        return argument, entry
+
+    def _find_function(self, name: str) -> Optional[str]:
+        """Search a function object template in the ``etc`` directories."""
+        if name not in self._functions:
+            found = None
+            for directory in self.etc:
+                root = os.path.join(directory, "caseDicts", "postProcessing")
+                for path, _dirs, files in os.walk(root):
+                    if name in files:
+                        found = os.path.join(path, name)
+                        break
+                if found is not None:
+                    break
+            self._functions[name] = found
+        return self._functions[name]
+
+
+def _unquote(argument: str) -> str:
+    if len(argument) >= 2 and argument[0] == argument[-1] == '"':
+        return argument[1:-1]
+    return argument
+
+
+def _find(directories: List[str], filename: str) -> Optional[str]:
+    if os.path.isabs(filename):
+        return filename if os.path.isfile(filename) else None
+    for directory in directories:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _function_arguments(arguments: str) -> Dict[str, Any]:
+    """The entries for the arguments of an ``#includeFunc``.
+
+    ``key=value`` arguments become entries; other arguments are the fields
+    the function works on (``field`` if there's one, ``fields`` otherwise).
+    """
+    pieces = []
+    depth = 0
+    start = 0
+    for pos, char in enumerate(arguments):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            pieces.append(arguments[start:pos])
+            start = pos + 1
+    pieces.append(arguments[start:])
+
+    entries = []
+    fields = []
+    for piece in pieces:
+        key, equals, value = piece.partition("=")
+        if equals:
+            entries.append(f"{key.strip()} {value.strip()};")
+        elif piece.strip():
+            fields.append(piece.strip())
+    result = parse("\n".join(entries))
+    if len(fields) == 1:
+        result["field"] = fields[0]
+    elif fields:
+        result["fields"] = fields
+    return result
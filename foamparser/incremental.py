@@ -0,0 +1,269 @@
+"""Push style parser, for content that arrives in chunks.
+
+The parser follows the same grammar as ``parser.proc_dict``/``proc_list``,
+but keeps the open dictionaries and lists in an explicit stack, so it can
+stop at the end of any chunk and resume when the next one arrives. Only the
+content that can't be processed yet (a token, string or comment cut by the
+end of a chunk) is kept between calls to ``feed``.
+
+Sized numeric lists are still read in bulk: their body is converted as it
+arrives, a piece at a time (cut between values), into the resulting array.
+Only the start of a body (see ``numeric.StreamedList``) is kept, so a list
+that turns out not to be numeric can still go through the generic path;
+past that, such a list is an ``InvalidListError``.
+
+Includes are recorded like in ``proc_dict``; the argument of an
+``#includeFunc`` (the rest of its line) is kept until its line ends.
+"""
+
+from typing import Any
+from typing import Dict
+
+from .exceptions import InvalidListError
+from .exceptions import UnexpectedCharacterError
+from .exceptions import UnexpectedTokenError
+from .numeric import StreamedList
+from .parser import LIST_READERS
+from .parser import TENSOR_READERS
+from .parser import token_value
+from .scanner import DICT_END
+from .scanner import DICT_START
+from .scanner import END
+from .scanner import IDENTIFIER
+from .scanner import INCLUDE
+from .scanner import LIST_END
+from .scanner import LIST_START
+from .scanner import QUOTED_STRING
+from .scanner import scan
+
+
+# The type of the numbers of each list read in bulk, and the width of its
+# elements (0 for plain numbers, closed by the first ")"; the others are
+# lists of tuples, closed by the ")" after the last tuple).
+_BULK_LISTS = {
+    "List<scalar>": ("d", 0),
+    "List<label>": ("q", 0),
+    "List<vector>": ("d", 3),
+    "List<symmTensor>": ("d", 6),
+    "List<tensor>": ("d", 9),
+    "List<sphericalTensor>": ("d", 1),
+}
+
+
+class IncrementalParser:
+    """Parse Foam content fed in chunks, with ``feed()`` and ``close()``.
+
+    The chunks can be text or bytes (but all of the same type).
+    """
+
+    def __init__(self, tensors: bool = False):
+        self._readers = TENSOR_READERS if tensors else LIST_READERS
+        self._buffer = None
+        self._final = False
+        self._result = {}
+        # Open dictionaries are ``[dict, entry, values]``, open lists are
+        # ``[list]``.
+        self._stack = [[self._result, None, []]]
+        self._include = None
+        self._done = False
+        # the sized list being read in bulk
+        self._bulk = None
+        # how much of the content was processed before the buffer
+        self._consumed = 0
+
+    def feed(self, chunk) -> None:
+        """Process a chunk of content."""
+        if self._bulk is not None:
+            if not self._feed_bulk(chunk):
+                return
+        elif self._buffer is None:
+            self._buffer = chunk
+        else:
+            self._buffer += chunk
+        self._process()
+
+    def close(self) -> Dict[str, Any]:
+        """Process whatever is left and return the resulting dictionary."""
+        self._final = True
+        if self._bulk is not None:
+            self._feed_bulk(self._bulk.empty)
+        if self._buffer is not None:
+            self._process()
+        return self._result
+
+    def _process(self) -> None:
+        """Process the buffer, until its end or until a list that must be read
+        in bulk doesn't close in it."""
+        while True:
+            buffer = self._buffer
+            pos = 0
+            tokens = scan(buffer, 0, not self._final)
+            for kind, start, end in tokens:
+                if self._done:
+                    pos = len(buffer)
+                    break
+                pos = end
+                if kind == INCLUDE and len(self._stack[-1]) > 1:
+                    if token_value(buffer, start, end) == "#includeFunc":
+                        stop = self._include_func(buffer, end)
+                        if stop < 0:
+                            pos = start
+                            break
+                        tokens.send(stop)
+                        pos = stop
+                        continue
+                self._token(kind, buffer, start, end)
+                if self._bulk is not None:
+                    self._bulk.start = self._consumed + end
+                    break
+
+            self._consumed += pos
+            if self._bulk is None:
+                self._buffer = buffer[pos:]
+                return
+            self._buffer = None
+            if not self._feed_bulk(buffer[pos:]):
+                return
+
+    def _feed_bulk(self, chunk) -> bool:
+        """Convert the body of the list being read in bulk.
+
+        Once the list closes (or the content ends), puts what comes after it
+        back in the buffer and returns True.
+        """
+        bulk = self._bulk
+        close = bulk.feed(chunk)
+        if close < 0 and not self._final:
+            return False
+
+        value = bulk.finish() if close >= 0 else None
+        frame = self._stack[-1]
+        if value is not None:
+            frame[2].append(value)
+            self._buffer = chunk[close + 1 :]
+            self._consumed += bulk.length + 1
+        elif bulk.kept:
+            # not a numeric list after all; let the generic path deal with it
+            inner = []
+            frame[2].append(inner)
+            self._stack.append([inner])
+            self._buffer = bulk.body() + (chunk[close:] if close >= 0 else chunk[:0])
+        else:
+            raise InvalidListError(bulk.start)
+        self._bulk = None
+        return True
+
+    def _token(self, kind: int, text, start: int, end: int) -> None:
+        if self._include is not None:
+            # the filename of an include, optionally followed by its end
+            include, self._include = self._include, None
+            if include:
+                self._add_include(token_value(text, start, end))
+                return
+            if kind == END:
+                return
+
+        if kind == QUOTED_STRING:
+            value = token_value(text, start + 1, end - 1)
+        else:
+            value = token_value(text, start, end)
+
+        frame = self._stack[-1]
+        if len(frame) == 1:
+            self._list_token(frame[0], kind, value, start)
+        else:
+            self._dict_token(frame, kind, value)
+
+    def _include_func(self, text, end: int) -> int:
+        """Record the ``#includeFunc`` that ends at ``end``, with the rest of
+        the line as its argument (like ``include_argument``).
+
+        Returns the end of the line, or -1 if it isn't in the buffer yet.
+        """
+        stop = text.find("\n" if isinstance(text, str) else b"\n", end)
+        if stop < 0:
+            if not self._final:
+                return -1
+            stop = len(text)
+        self._add_include(token_value(text, end, stop).strip().rstrip(";").strip())
+        return stop
+
+    def _add_include(self, argument: str) -> None:
+        frame = self._stack[-1]
+        frame[0].setdefault("#includes", []).append(argument)
+        # the ";" after it is optional
+        self._include = False
+
+    def _dict_token(self, frame, kind: int, value: str) -> None:
+        result, entry, values = frame
+        if kind == IDENTIFIER or kind == QUOTED_STRING:
+            if entry is None:
+                frame[1] = value
+            else:
+                values.append(value)
+        elif kind == END:
+            if entry is None:
+                raise UnexpectedTokenError(value)
+            if len(values) == 1:
+                result[entry] = values[0]
+            else:
+                result[entry] = values
+            frame[1] = None
+            frame[2] = []
+        elif kind == LIST_START:
+            if entry is None:
+                raise UnexpectedTokenError(value)
+            if not self._start_bulk(values):
+                inner = []
+                values.append(inner)
+                self._stack.append([inner])
+        elif kind == DICT_START:
+            if entry is None:
+                raise UnexpectedTokenError(value)
+            inner = {}
+            result[entry] = inner
+            frame[1] = None
+            frame[2] = []
+            self._stack.append([inner, None, []])
+        elif kind == DICT_END:
+            self._stack.pop()
+            if not self._stack:
+                # like ``proc_dict``, anything after a "}" closing the root
+                # is ignored.
+                self._done = True
+        elif kind == LIST_END:
+            raise UnexpectedTokenError(value)
+        elif kind == INCLUDE:
+            self._include = True
+
+    def _list_token(self, result, kind: int, value: str, start: int) -> None:
+        if kind == IDENTIFIER or kind == QUOTED_STRING:
+            result.append(value)
+        elif kind == LIST_END:
+            self._stack.pop()
+        elif kind == LIST_START:
+            inner = []
+            result.append(inner)
+            self._stack.append([inner])
+        elif kind == DICT_START:
+            inner = {}
+            result.append(inner)
+            self._stack.append([inner, None, []])
+        elif kind in (DICT_END, END):
+            raise UnexpectedTokenError(value)
+        else:
+            raise UnexpectedCharacterError(value, start)
+
+    def _start_bulk(self, values) -> bool:
+        """Check if the list just opened can be read in bulk, and start it."""
+        if len(values) < 2 or not isinstance(values[-2], str):
+            return False
+        list_type, count = values[-2:]
+        if list_type not in self._readers or list_type not in _BULK_LISTS:
+            return False
+        if not isinstance(count, str) or not count.isdigit():
+            return False
+        typecode, width = _BULK_LISTS[list_type]
+        self._bulk = StreamedList(typecode, width, int(count), self._buffer[:0])
+        return True
+
@@ -0,0 +1,229 @@
+"""Lazy parsing, for reading a few entries of big contents.
+
+Instead of parsing everything, the content is skimmed once, recording the
+span of each entry (at every level) and jumping over lists by matching their
+brackets, without producing their values. The resulting ``LazyDict`` only
+parses an entry when it is accessed.
+
+When the entries are known beforehand, ``select`` does the same skimming,
+but parses the selected entries on the way.
+"""
+
+from collections.abc import Mapping
+from fnmatch import fnmatchcase
+
+from .exceptions import UnexpectedTokenError
+from .parser import include_argument
+from .parser import proc_dict
+from .parser import proc_typed_list
+from .parser import skip_list
+from .parser import token_value
+from .scanner import DICT_END
+from .scanner import DICT_START
+from .scanner import END
+from .scanner import IDENTIFIER
+from .scanner import INCLUDE
+from .scanner import LIST_END
+from .scanner import LIST_START
+from .scanner import QUOTED_STRING
+from .scanner import scan
+from .scanner import skip_block
+
+# The kinds of spans recorded for each entry.
+VALUE = 0
+DICT = 1
+INCLUDES = 2
+
+
+class LazyDict(Mapping):
+    """A dictionary whose values are only parsed when accessed.
+
+    Sub-dictionaries are also ``LazyDict``; parsed values are kept, so each
+    entry is parsed at most once.
+    """
+
+    def __init__(self, text, spans, readers):
+        self._text = text
+        self._spans = spans
+        self._readers = readers
+        self._values = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+
+        span = self._spans[key]
+        if span[0] == DICT:
+            value = LazyDict(self._text, span[1], self._readers)
+        elif span[0] == INCLUDES:
+            value = span[1]
+        else:
+            _kind, start, end = span
+            tokens = scan(self._text, start, stop=end)
+            entry = proc_dict(self._text, tokens, self._readers)
+            value = next(iter(entry.values()))
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __repr__(self):
+        return f"LazyDict({list(self._spans)!r})"
+
+
+def skim(text, tokens, readers, binary: bool = False):
+    """Record the span of each entry of a dictionary, down to its end.
+
+    Spans are ``(VALUE, start, end)`` for entries with values (covering the
+    whole entry, from its name to the ";"), ``(DICT, spans)`` for
+    sub-dictionaries and ``(INCLUDES, filenames)`` for the include list.
+    Binary lists are always skipped through their reader, as their payload
+    can't be looked at. Sub-dictionaries are kept in an explicit stack (like
+    in ``proc_nested``), so nesting has no limit.
+    """
+    root = spans = {}
+    # the spans of the enclosing dictionaries
+    stack = []
+    entry = None
+    entry_start = 0
+    # the last two values of the entry, to find sized lists
+    previous = last = None
+    after_include = False
+    for kind, start, end in tokens:
+        included, after_include = after_include, False
+        if kind == IDENTIFIER or kind == QUOTED_STRING:
+            if kind == QUOTED_STRING:
+                value = token_value(text, start + 1, end - 1)
+            else:
+                value = token_value(text, start, end)
+            if entry is None:
+                entry = value
+                entry_start = start
+                previous = last = None
+            else:
+                previous, last = last, value
+        elif kind == END:
+            if entry is None:
+                if included:
+                    continue
+                raise UnexpectedTokenError(token_value(text, start, end))
+            spans[entry] = (VALUE, entry_start, end)
+            entry = None
+        elif kind == LIST_START:
+            if entry is None:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            tokens.send(skip_list(text, end, previous, last, readers, binary))
+            previous, last = last, None
+        elif kind == DICT_START:
+            if entry is None:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            inner = {}
+            spans[entry] = (DICT, inner)
+            stack.append(spans)
+            spans = inner
+            entry = None
+        elif kind == DICT_END:
+            if not stack:
+                break
+            spans = stack.pop()
+            entry = None
+        elif kind == LIST_END:
+            raise UnexpectedTokenError(token_value(text, start, end))
+        elif kind == INCLUDE:
+            _directive, argument = include_argument(text, tokens, start, end)
+            if "#includes" not in spans:
+                spans["#includes"] = (INCLUDES, [])
+            spans["#includes"][1].append(argument)
+            after_include = True
+    return root
+
+
+def select(text, tokens, paths, readers, binary: bool = False):
+    """Parse only the entries of a dictionary in the given key paths.
+
+    Each path is a tuple of keys (which can be ``fnmatch`` patterns, like
+    ``*``); the dictionaries in the paths are descended into, everything else
+    is skipped like in ``skim``. Dictionaries left without selected entries
+    don't appear in the result.
+    """
+    root = result = {}
+    # the enclosing dictionaries, as ``(result, paths, entry)``
+    stack = []
+    entry = None
+    # whether the current entry is selected as a whole, and the rest of the
+    # paths going through it
+    taken = False
+    inner = []
+    values = []
+    previous = last = None
+    after_include = False
+    for kind, start, end in tokens:
+        included, after_include = after_include, False
+        if kind == IDENTIFIER or kind == QUOTED_STRING:
+            if kind == QUOTED_STRING:
+                value = token_value(text, start + 1, end - 1)
+            else:
+                value = token_value(text, start, end)
+            if entry is None:
+                entry = value
+                matched = [path[1:] for path in paths if fnmatchcase(value, path[0])]
+                taken = () in matched
+                inner = [path for path in matched if path]
+                values = []
+                previous = last = None
+            elif taken:
+                values.append(value)
+            else:
+                previous, last = last, value
+        elif kind == END:
+            if entry is None:
+                if included:
+                    continue
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if taken:
+                result[entry] = values[0] if len(values) == 1 else values
+            entry = None
+        elif kind == LIST_START:
+            if entry is None:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if taken:
+                values.append(proc_typed_list(text, tokens, values, end, readers))
+            else:
+                tokens.send(skip_list(text, end, previous, last, readers, binary))
+                previous, last = last, None
+        elif kind == DICT_START:
+            if entry is None:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if taken:
+                result[entry] = proc_dict(text, tokens, readers)
+            elif inner:
+                # added to its dictionary at its end, if anything was selected
+                stack.append((result, paths, entry))
+                result = {}
+                paths = inner
+            else:
+                tokens.send(skip_block(text, end))
+            entry = None
+        elif kind == DICT_END:
+            if not stack:
+                break
+            selected = result
+            result, paths, entry = stack.pop()
+            if selected:
+                result[entry] = selected
+            entry = None
+        elif kind == LIST_END:
+            raise UnexpectedTokenError(token_value(text, start, end))
+        elif kind == INCLUDE:
+            _directive, argument = include_argument(text, tokens, start, end)
+            if any(fnmatchcase("#includes", path[0]) for path in paths):
+                result.setdefault("#includes", []).append(argument)
+            after_include = True
+    return root
+
@@ -0,0 +1,130 @@
+"""Reader for the ``constant/polyMesh`` files.
+
+The mesh files are not dictionaries, but a ``FoamFile`` header followed by a
+single sized list; each list is read in bulk into arrays (mapped over the
+file contents for meshes written with ``format binary``):
+
+- ``points``: a ``(N, 3)`` array of coordinates;
+- ``faces``: a CSR style ``(offsets, labels)`` pair;
+- ``owner`` and ``neighbour``: label arrays;
+- ``boundary``: a dictionary with the patches, by name.
+
+Compressed files (``points.gz`` and so on) are read as well.
+"""
+
+import os
+
+from typing import Any
+from typing import Dict
+
+from . import numeric
+from .exceptions import InvalidListError
+from .exceptions import UnexpectedTokenError
+from .parser import TENSOR_READERS
+from .parser import file_readers
+from .parser import proc_dict
+from .parser import proc_list
+from .parser import read_contents
+from .parser import token_value
+from .scanner import DICT_START
+from .scanner import IDENTIFIER
+from .scanner import LIST_START
+from .scanner import scan
+
+
+def read_mesh(path: str) -> Dict[str, Any]:
+    """Read all the files of a polyMesh directory."""
+    return {
+        "points": read_points(mesh_file(path, "points")),
+        "faces": read_faces(mesh_file(path, "faces")),
+        "owner": read_labels(mesh_file(path, "owner")),
+        "neighbour": read_labels(mesh_file(path, "neighbour")),
+        "boundary": read_boundary(mesh_file(path, "boundary")),
+    }
+
+
+def mesh_file(path: str, name: str) -> str:
+    """The path of a mesh file, which may have been compressed."""
+    filename = os.path.join(path, name)
+    if not os.path.exists(filename) and os.path.exists(filename + ".gz"):
+        return filename + ".gz"
+    return filename
+
+
+def read_points(path: str):
+    header, points = read_list_file(read_contents(path), "List<vector>")
+    return points
+
+
+def read_faces(path: str):
+    header, faces = read_list_file(read_contents(path), "faceList")
+    return faces
+
+
+def read_labels(path: str):
+    header, labels = read_list_file(read_contents(path), "List<label>")
+    return labels
+
+
+def read_boundary(path: str) -> Dict[str, Any]:
+    header, patches = read_list_file(read_contents(path), None)
+    return dict(zip(patches[::2], patches[1::2]))
+
+
+def read_list_file(text, list_type):
+    """Read a ``FoamFile`` header followed by a single sized list.
+
+    The list body is read in bulk as ``list_type``; without one, the list
+    goes through the generic parser. For a ``faceList``, a
+    ``faceCompactList`` (an offsets list followed by a labels list) is also
+    accepted.
+    """
+    tokens = scan(text)
+    header = {}
+    readers = TENSOR_READERS
+    for kind, start, end in tokens:
+        if kind != IDENTIFIER:
+            raise UnexpectedTokenError(token_value(text, start, end))
+
+        value = token_value(text, start, end)
+        if value == "FoamFile":
+            kind, start, end = next(tokens)
+            if kind != DICT_START:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            header = proc_dict(text, tokens)
+            readers = file_readers(header, tensors=True)
+            continue
+
+        if list_type == "faceList" and header.get("class") == "faceCompactList":
+            reader = readers["List<label>"]
+            offsets = _read_sized(text, tokens, value, reader)
+            labels = _read_sized(text, tokens, None, reader)
+            return header, (offsets, labels)
+        if list_type == "faceList":
+            reader = numeric.read_faces
+        else:
+            reader = readers.get(list_type)
+        return header, _read_sized(text, tokens, value, reader)
+    raise InvalidListError(len(text))
+
+
+def _read_sized(text: str, tokens, count, reader):
+    """Read a sized list, whose size may have already been consumed."""
+    if count is None:
+        kind, start, end = next(tokens)
+        if kind != IDENTIFIER:
+            raise UnexpectedTokenError(token_value(text, start, end))
+        count = token_value(text, start, end)
+
+    kind, start, end = next(tokens)
+    if kind != LIST_START:
+        raise UnexpectedTokenError(token_value(text, start, end))
+    if reader is None:
+        return proc_list(text, tokens)
+
+    read = reader(text, end, count)
+    if read is None:
+        raise InvalidListError(end)
+    value, end = read
+    tokens.send(end)
+    return value
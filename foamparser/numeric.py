@@ -0,0 +1,622 @@
+"""Bulk conversion of numeric lists.
+
+Large numeric lists (e.g. ``internalField nonuniform List<scalar> N (...)``)
+are converted in a single native call instead of producing one string per
+value. NumPy is used when available, with ``array.array`` as the fallback.
+
+The readers work over text or bytes (including buffers like ``mmap``), and
+those for binary lists map the raw payload without copying it.
+"""
+
+import re
+import sys
+import warnings
+
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import accumulate
+
+from .exceptions import InvalidListError
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# Each pattern/table comes in a text and a bytes flavour; ``_flavour`` picks
+# the right one for the content being read.
+#
+# The end of the last tuple immediately followed by the end of the list.
+_TUPLES_END = (re.compile(r"\)\s*\)"), re.compile(rb"\)\s*\)"))
+# Where big bodies can be split in chunks: after a space for flat lists, after
+# the end of an element for lists of tuples/faces.
+_WHITESPACE = (re.compile(r"\s"), re.compile(rb"\s"))
+_TUPLE_BOUNDARY = (re.compile(r"\)"), re.compile(rb"\)"))
+_PARENTHESES = (str.maketrans("()", "  "), bytes.maketrans(b"()", b"  "))
+_LIST_CHARS = (("(", ")", " "), (b"(", b")", b" "))
+_SPACES = ((" ", "\n", "\t", "\r"), (b" ", b"\n", b"\t", b"\r"))
+# The labels of each face in a face list (``4(0 1 2 3)``) and, the other way
+# around, the sizes of each face.
+_FACE_LABELS = (re.compile(r"\([^()]*\)"), re.compile(rb"\([^()]*\)"))
+_FACE_SIZES = (re.compile(r"\d+\s*\(|\)"), re.compile(rb"\d+\s*\(|\)"))
+
+# Size of the chunks used to convert big list bodies.
+CHUNK_SIZE = 1 << 24
+# How much of a body arriving in chunks is kept before converting it.
+STREAM_BUFFER_SIZE = 1 << 16
+# Bodies bigger than this are converted in parallel, when there are workers
+# for it, in chunks of this size.
+PARALLEL_SIZE = 1 << 22
+# How many chunks per worker are in flight while converting in parallel.
+PARALLEL_WINDOW = 2
+
+_NUMPY_TYPES = {"d": "f8", "f": "f4", "q": "i8", "i": "i4"}
+_PYTHON_TYPES = {"d": float, "f": float, "q": int, "i": int}
+_INTEGER_TYPES = frozenset("qi")
+
+# Sizes (in bits) of labels and scalars in the ``arch`` of binary files.
+_LABEL_TYPES = {"32": "i", "64": "q"}
+_SCALAR_TYPES = {"32": "f", "64": "d"}
+
+
+def _flavour(text) -> int:
+    return 0 if isinstance(text, str) else 1
+
+
+def is_array(value) -> bool:
+    """Check if the value is one of the arrays produced by this module."""
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        return True
+    return isinstance(value, (array, memoryview))
+
+
+def empty_array(typecode: str, size: int):
+    """An array of ``size`` numbers, to be filled."""
+    if numpy is not None:
+        return numpy.empty(size, dtype=_NUMPY_TYPES[typecode])
+    return array(typecode, [0]) * size
+
+
+def to_array(body, typecode: str, count: int):
+    """Convert a whitespace separated body into an array of ``count`` numbers.
+
+    Returns ``None`` if the body can't be converted (or has the wrong number
+    of elements), so the caller can fall back to the generic parser.
+    """
+    result = _convert(body, typecode)
+    if result is None or len(result) != count:
+        return None
+    return result
+
+
+def region_to_array(
+    text,
+    start: int,
+    end: int,
+    typecode: str,
+    count: int,
+    boundary,
+    prepare=None,
+    workers: int = 1,
+):
+    """Convert ``text[start:end]`` into an array of ``count`` numbers.
+
+    Large regions are converted in chunks of about ``CHUNK_SIZE``, cut right
+    after a match of ``boundary``, straight into the resulting array; so,
+    besides the array itself, only one chunk of the text is ever copied out
+    of the (possibly memory mapped) content. ``prepare`` is applied to each
+    chunk before converting it.
+
+    With ``workers``, regions bigger than ``PARALLEL_SIZE`` are split in
+    chunks of that size that are converted in parallel (see
+    ``_parallel_chunks``); then, a few chunks per worker are copied out at a
+    time.
+    """
+    size = end - start
+    if workers > 1 and size > PARALLEL_SIZE:
+        converted = _parallel_chunks(
+            _chunks(text, start, end, boundary, PARALLEL_SIZE),
+            typecode,
+            prepare,
+            workers,
+        )
+    elif size <= CHUNK_SIZE:
+        body = text[start:end]
+        if prepare is not None:
+            body = prepare(body)
+            if body is None:
+                return None
+        return to_array(body, typecode, count)
+    else:
+        converted = (
+            _convert_chunk(chunk, typecode, prepare)
+            for chunk in _chunks(text, start, end, boundary)
+        )
+
+    result = empty_array(typecode, count)
+    filled = 0
+    for values in converted:
+        if values is None or filled + len(values) > count:
+            return None
+        result[filled : filled + len(values)] = values
+        filled += len(values)
+
+    if filled != count:
+        return None
+    return result
+
+
+def _parallel_chunks(chunks, typecode: str, prepare, workers: int):
+    """Convert the chunks in ``workers`` processes (or threads, on Python
+    builds without the GIL), yielding the arrays in order.
+
+    Only ``PARALLEL_WINDOW`` chunks per worker are taken (and copied out of
+    the text) ahead of the one being yielded.
+    """
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    pool = ProcessPoolExecutor if gil else ThreadPoolExecutor
+    convert = partial(_convert_chunk, typecode=typecode, prepare=prepare)
+    with pool(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(convert, chunk))
+            # not kept while waiting for the results
+            del chunk
+            if len(pending) >= workers * PARALLEL_WINDOW:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _chunks(text, start: int, end: int, boundary, size: int = 0):
+    size = size or CHUNK_SIZE
+    while start < end:
+        cut = start + size
+        if cut >= end:
+            cut = end
+        else:
+            match = boundary.search(text, cut, end)
+            cut = end if match is None else match.end()
+        yield text[start:cut]
+        start = cut
+
+
+def _convert_chunk(chunk, typecode: str, prepare=None):
+    if prepare is not None:
+        chunk = prepare(chunk)
+        if chunk is None:
+            return None
+    return _convert(chunk, typecode)
+
+
+def _tuples(table, width: int, chunk):
+    """The numbers of a chunk of tuples, if all of them have ``width``."""
+    if not _same_width(chunk, width):
+        return None
+    return chunk.translate(table)
+
+
+def _same_width(chunk, width: int) -> bool:
+    """Check if every tuple in a chunk (cut right after one of them) has
+    ``width`` values."""
+    if numpy is None:
+        opening, closing, space = _LIST_CHARS[_flavour(chunk)]
+        spaced = chunk.replace(opening, space + opening + space)
+        tokens = spaced.replace(closing, space + closing + space).split()
+        size = width + 2
+        count = len(tokens) // size
+        # each tuple must be a "(", ``width`` values and a ")"
+        return (
+            len(tokens) == count * size
+            and tokens[::size].count(opening) == count
+            and tokens[size - 1 :: size].count(closing) == count
+            and tokens.count(opening) == count
+            and tokens.count(closing) == count
+        )
+
+    if isinstance(chunk, str):
+        chunk = chunk.encode()
+    chars = numpy.frombuffer(chunk, dtype=numpy.uint8)
+    if not len(chars):
+        return True
+    # whitespace and parentheses (anything else up to ")" isn't in numbers)
+    separators = chars <= ord(")")
+    # the parentheses, and where each value starts
+    marks = separators & (chars >= ord("("))
+    marks[1:] |= separators[:-1] > separators[1:]
+    marks[0] |= not separators[0]
+    kinds = chars[numpy.flatnonzero(marks)]
+    if len(kinds) % (width + 2):
+        return False
+    # each tuple must be a "(", ``width`` values and a ")"
+    kinds = kinds.reshape(-1, width + 2)
+    return bool(
+        (kinds[:, 0] == ord("(")).all()
+        and (kinds[:, -1] == ord(")")).all()
+        and (kinds[:, 1:-1] > ord(")")).all()
+    )
+
+
+def _substitute(pattern, replacement, chunk):
+    return pattern.sub(replacement, chunk)
+
+
+def _convert(body, typecode: str):
+    if numpy is not None:
+        with warnings.catch_warnings():
+            # numpy only warns when it can't convert the whole string.
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                result = numpy.fromstring(
+                    body, dtype=_NUMPY_TYPES[typecode], sep=" "
+                )
+            except (ValueError, DeprecationWarning):
+                return None
+        if typecode in _INTEGER_TYPES and result.size:
+            # numpy saturates labels that don't fit, instead of failing; a
+            # value at the limits may be one of those, so the list is left to
+            # the generic parser
+            info = numpy.iinfo(result.dtype)
+            if result.max() == info.max or result.min() == info.min:
+                return None
+        return result
+    try:
+        return array(typecode, map(_PYTHON_TYPES[typecode], body.split()))
+    except (ValueError, OverflowError):
+        return None
+
+
+class StreamedList:
+    """The body of a sized list of ``count`` numbers (``width`` 0) or tuples
+    of ``width`` numbers, converted as it arrives in chunks.
+
+    The body is kept while it is smaller than ``STREAM_BUFFER_SIZE`` (so it
+    can still be parsed some other way, if it isn't numeric); after that, it
+    is converted each time that much of it arrives, up to its last complete
+    value, straight into the resulting array, and only the rest is kept.
+    ``empty`` is an empty ``str`` or ``bytes``, like the chunks.
+    """
+
+    def __init__(self, typecode: str, width: int, count: int, empty):
+        self.typecode = typecode
+        self.width = width
+        self.count = count
+        self.empty = empty
+        flavour = _flavour(empty)
+        self.opening, self.closing, _space = _LIST_CHARS[flavour]
+        self.spaces = _SPACES[flavour]
+        self.prepare = partial(_tuples, _PARENTHESES[flavour], width) if width else None
+        # the ")" closing the list, counting the ones closing tuples
+        self.needed = count + 1 if width else 1
+        self.closed = 0
+        self.opened = 0
+        self.start = 0
+        self.length = 0
+        self.pending = []
+        self.pending_size = 0
+        # whether ``pending`` is the whole body read so far
+        self.kept = True
+        self.result = None
+        self.filled = 0
+        self.failed = False
+
+    def feed(self, chunk) -> int:
+        """Take a chunk of the body; returns the position of the ")" closing
+        the list in it (or -1 if it isn't there)."""
+        close = -1
+        closing = chunk.count(self.closing)
+        if self.closed + closing >= self.needed:
+            for _found in range(self.needed - self.closed):
+                close = chunk.find(self.closing, close + 1)
+            chunk = chunk[:close]
+        self.closed += closing
+        self.opened += chunk.count(self.opening)
+        self.length += len(chunk)
+        self.pending.append(chunk)
+        self.pending_size += len(chunk)
+        if close < 0 and self.pending_size > STREAM_BUFFER_SIZE:
+            self._convert_pending()
+        return close
+
+    def finish(self):
+        """The array, once the list closed (None if it isn't numeric)."""
+        if not self.failed:
+            self._convert(self.body())
+        if self.failed or self.filled != self.count * max(self.width, 1):
+            return None
+        if self.opened != (self.count if self.width else 0):
+            # nested lists, or tuples that don't add up
+            return None
+        result = self.result
+        if result is None:
+            result = self._allocate()
+        return shaped(result, self.width) if self.width else result
+
+    def body(self):
+        return self.empty.join(self.pending)
+
+    def _convert_pending(self) -> None:
+        """Convert the body received so far, up to its last complete value."""
+        if self.failed:
+            # no need to keep anything
+            self.pending = []
+            self.pending_size = 0
+            self.kept = False
+            return
+        body = self.body()
+        if self.width:
+            cut = body.rfind(self.closing) + 1
+        else:
+            cut = max(body.rfind(space) for space in self.spaces) + 1
+        if cut <= 0:
+            return
+        self._convert(body[:cut])
+        self.kept = False
+        self.pending = [body[cut:]]
+        self.pending_size = len(body) - cut
+
+    def _convert(self, body) -> None:
+        if self.prepare is not None:
+            body = self.prepare(body)
+        values = None if body is None else _convert(body, self.typecode)
+        total = self.count * max(self.width, 1)
+        if values is None or self.filled + len(values) > total:
+            self.failed = True
+            return
+        if self.result is None:
+            self.result = self._allocate()
+        self.result[self.filled : self.filled + len(values)] = values
+        self.filled += len(values)
+
+    def _allocate(self):
+        return empty_array(self.typecode, self.count * max(self.width, 1))
+
+
+def read_list(text, start: int, count: str, typecode: str, workers: int = 1):
+    """Read the body of a flat numeric list whose "(" ends at ``start``.
+
+    Returns the array and the position right after the closing ")", or
+    ``None`` if the list can't be read in bulk.
+    """
+    if not count.isdigit():
+        return None
+    flavour = _flavour(text)
+    close = text.find(_LIST_CHARS[flavour][1], start)
+    if close < 0:
+        return None
+    result = region_to_array(
+        text,
+        start,
+        close,
+        typecode,
+        int(count),
+        _WHITESPACE[flavour],
+        workers=workers,
+    )
+    if result is None:
+        return None
+    return result, close + 1
+
+
+def tuples_end(text, start: int, size: int) -> int:
+    """Find the ")" closing a list of ``size`` parenthesised elements.
+
+    The elements can't have nested lists in them. Returns -1 if the list
+    doesn't have exactly ``size`` elements.
+    """
+    flavour = _flavour(text)
+    opening, closing, _space = _LIST_CHARS[flavour]
+    if size == 0:
+        close = text.find(closing, start)
+    else:
+        match = _TUPLES_END[flavour].search(text, start)
+        close = -1 if match is None else match.end() - 1
+    if close < 0:
+        return -1
+
+    chunks = _chunks(text, start, close, _TUPLE_BOUNDARY[flavour])
+    if sum(chunk.count(opening) for chunk in chunks) != size:
+        return -1
+    return close
+
+
+def list_end(text, start: int, size: int) -> int:
+    """Find the ")" closing a sized list of numbers or of tuples of numbers.
+
+    Nothing is converted, so this is a cheap way to skip over a list.
+    Returns -1 if the list isn't one of those.
+    """
+    opening, closing, _space = _LIST_CHARS[_flavour(text)]
+    close = text.find(closing, start)
+    if close >= 0 and text.find(opening, start, close) < 0:
+        return close
+    return tuples_end(text, start, size)
+
+
+def read_tuples(text, start: int, count: str, width: int, workers: int = 1):
+    """Read the body of a list of fixed width tuples, like ``((1 2 3) (4 5 6))``.
+
+    The result is a ``(count, width)`` array; without NumPy, a memoryview
+    with that shape over a flat ``array.array`` (an empty list is returned
+    flat, as memoryviews can't have a zero sized shape). Returns ``None`` if
+    any of the tuples doesn't have ``width`` numbers.
+    """
+    if not count.isdigit():
+        return None
+    size = int(count)
+    close = tuples_end(text, start, size)
+    if close < 0:
+        return None
+
+    flavour = _flavour(text)
+    result = region_to_array(
+        text,
+        start,
+        close,
+        "d",
+        size * width,
+        _TUPLE_BOUNDARY[flavour],
+        partial(_tuples, _PARENTHESES[flavour], width),
+        workers,
+    )
+    if result is None:
+        return None
+    return shaped(result, width), close + 1
+
+
+def read_faces(text, start: int, count: str, workers: int = 1):
+    """Read the body of a face list, like ``(4(0 1 2 3) 3(0 4 1))``.
+
+    The result is a CSR style ``(offsets, labels)`` pair, where the labels of
+    face ``i`` are ``labels[offsets[i]:offsets[i + 1]]``.
+    """
+    if not count.isdigit():
+        return None
+    size = int(count)
+    close = tuples_end(text, start, size)
+    if close < 0:
+        return None
+
+    flavour = _flavour(text)
+    space = _LIST_CHARS[flavour][2]
+    boundary = _TUPLE_BOUNDARY[flavour]
+    face_labels = _FACE_LABELS[flavour]
+    face_sizes = _FACE_SIZES[flavour]
+    sizes = region_to_array(
+        text,
+        start,
+        close,
+        "q",
+        size,
+        boundary,
+        partial(_substitute, face_labels, space),
+        workers,
+    )
+    if sizes is None:
+        return None
+    offsets = accumulated(sizes)
+    labels = region_to_array(
+        text,
+        start,
+        close,
+        "q",
+        int(offsets[-1]),
+        boundary,
+        partial(_substitute, face_sizes, space),
+        workers,
+    )
+    if labels is None:
+        return None
+    return (offsets, labels), close + 1
+
+
+def accumulated(sizes):
+    """Turn a list of sizes into the offsets of each element, starting at 0."""
+    if numpy is not None:
+        offsets = numpy.zeros(len(sizes) + 1, dtype="int64")
+        numpy.cumsum(sizes, out=offsets[1:])
+        return offsets
+    return array("q", accumulate(sizes, initial=0))
+
+
+def shaped(values, width: int):
+    """Reshape a flat array into rows of ``width`` elements."""
+    if numpy is not None:
+        return values.reshape(-1, width)
+    view = memoryview(values)
+    if not len(view):
+        return values
+    return view.cast("B").cast(view.format, (len(view) // width, width))
+
+
+def read_binary(
+    buffer, start: int, count: str, typecode: str, width: int = 1, swap=False
+):
+    """Map the raw payload of a binary list whose "(" ends at ``start``.
+
+    The result is a view over the buffer (not a copy), unless the payload was
+    written with a different byte order than this machine's and NumPy isn't
+    available. Unlike the text readers, a payload that doesn't fit is an
+    error, as it can't go through the generic parser.
+    """
+    if not count.isdigit():
+        raise InvalidListError(start)
+    size = int(count) * width
+    end = start + size * array(typecode).itemsize
+    if buffer[end : end + 1] != b")":
+        raise InvalidListError(start)
+
+    if numpy is not None:
+        dtype = numpy.dtype(_NUMPY_TYPES[typecode])
+        if swap:
+            dtype = dtype.newbyteorder()
+        result = numpy.frombuffer(buffer, dtype=dtype, count=size, offset=start)
+    elif swap:
+        result = array(typecode, buffer[start:end])
+        result.byteswap()
+    else:
+        result = memoryview(buffer)[start:end].cast(typecode)
+
+    if width > 1:
+        result = shaped(result, width)
+    return result, end + 1
+
+
+def binary_readers(arch: str):
+    """The readers for lists written with ``format binary``.
+
+    ``arch`` is the architecture in the header (e.g. ``LSB;label=32;scalar=64``)
+    with the byte order and the sizes of labels and scalars.
+    """
+    sizes = dict(item.split("=", 1) for item in arch.split(";") if "=" in item)
+    label = _LABEL_TYPES[sizes.get("label", "32")]
+    scalar = _SCALAR_TYPES[sizes.get("scalar", "64")]
+    swap = arch.startswith("MSB") != (sys.byteorder == "big")
+    return {
+        "List<scalar>": partial(read_binary, typecode=scalar, swap=swap),
+        "List<label>": partial(read_binary, typecode=label, swap=swap),
+        "List<vector>": partial(read_binary, typecode=scalar, width=3, swap=swap),
+        "List<symmTensor>": partial(
+            read_binary, typecode=scalar, width=6, swap=swap
+        ),
+        "List<tensor>": partial(read_binary, typecode=scalar, width=9, swap=swap),
+        "List<sphericalTensor>": partial(read_binary, typecode=scalar, swap=swap),
+    }
+
+
+def read_scalars(text, start: int, count: str, workers: int = 1):
+    return read_list(text, start, count, "d", workers)
+
+
+def read_labels(text, start: int, count: str, workers: int = 1):
+    return read_list(text, start, count, "q", workers)
+
+
+def read_vectors(text, start: int, count: str, workers: int = 1):
+    return read_tuples(text, start, count, 3, workers)
+
+
+def read_symm_tensors(text, start: int, count: str, workers: int = 1):
+    return read_tuples(text, start, count, 6, workers)
+
+
+def read_tensors(text, start: int, count: str, workers: int = 1):
+    return read_tuples(text, start, count, 9, workers)
+
+
+def read_spherical_tensors(text, start: int, count: str, workers: int = 1):
+    return read_tuples(text, start, count, 1, workers)
+
+
+def parallel_readers(readers, workers: int):
+    """The text ``readers`` converting big lists with ``workers``."""
+    if workers <= 1:
+        return readers
+    return {
+        list_type: partial(reader, workers=workers)
+        for list_type, reader in readers.items()
+    }
@@ -0,0 +1,145 @@
+"""Parsing of many files over a pool of processes.
+
+Results travel back from the workers pickled, except for their arrays:
+results with arrays are written by the worker in the format of the cache
+files (see ``foamparser.cache``), in a RAM backed directory when there is
+one (``/dev/shm``), and mapped by the parent process. So the numeric
+payloads are shared with the worker's output instead of being pickled and
+copied through a pipe.
+
+Only a few chunks of files per worker are parsed ahead of the one whose
+results are being consumed (see ``PARSE_WINDOW``), so a slow consumer
+doesn't leave every result waiting, in memory or in the shared directory.
+"""
+
+import os
+import shutil
+import tempfile
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from functools import partial
+from itertools import islice
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from .cache import load_result
+from .cache import store_result
+from .numeric import is_array
+from .parser import parse_file
+
+
+# Where the workers leave the results with arrays, if it exists.
+SHARED_DIRECTORY = "/dev/shm"
+
+# How many chunks of files per worker are submitted at a time.
+PARSE_WINDOW = 2
+
+
+class Parsed(NamedTuple):
+    """The result of parsing one of the files in ``parse_many``: either the
+    resulting dictionary or the error that stopped the parsing."""
+
+    path: str
+    result: Any
+    error: Optional[Exception]
+
+
+def parse_many(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    tensors: bool = False,
+    reader: Optional[Callable[[str], Any]] = None,
+) -> Iterator[Parsed]:
+    """Parse files in ``workers`` processes, ``chunksize`` files at a time.
+
+    Yields a ``Parsed`` per file, in the order of ``paths`` or, without
+    ``ordered``, as soon as each chunk of files is done. A file that can't
+    be parsed gives its error, without stopping the others. Files are taken
+    from ``paths`` as the results are consumed, ``PARSE_WINDOW`` chunks per
+    worker ahead.
+
+    ``reader`` (a function that can be sent to the workers, like a module
+    level function) reads each file instead of ``parse_file``.
+    """
+    if reader is None:
+        reader = partial(parse_file, tensors=tensors)
+    paths = iter(paths)
+    chunks = iter(lambda: list(islice(paths, chunksize)), [])
+    window = (workers or os.cpu_count() or 1) * PARSE_WINDOW
+    shared = SHARED_DIRECTORY if os.path.isdir(SHARED_DIRECTORY) else None
+    directory = tempfile.mkdtemp(prefix="foamparser-", dir=shared)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        submitted = (
+            executor.submit(_parse_chunk, chunk, reader, directory)
+            for chunk in chunks
+        )
+        pending = deque(islice(submitted, window))
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _running = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            # the next chunk is parsed while these results are consumed
+            pending.extend(islice(submitted, 1))
+            for path, result, stored, error in future.result():
+                if stored is not None:
+                    result = load_result(stored)
+                    # the mapping outlives the file
+                    os.unlink(stored)
+                yield Parsed(path, result, error)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _parse_chunk(paths: List[str], reader, directory: str):
+    """Parse a chunk of files in a worker.
+
+    Each file gives its path, its result (unless it has arrays), the file
+    where the result with arrays was stored, and its error. A result that
+    can't be stored is given as it is.
+    """
+    parsed = []
+    for path in paths:
+        try:
+            result = reader(path)
+        except Exception as error:
+            parsed.append((path, None, None, error))
+            continue
+
+        if not _has_arrays(result):
+            parsed.append((path, result, None, None))
+            continue
+        handle, stored = tempfile.mkstemp(dir=directory)
+        os.close(handle)
+        try:
+            store_result(stored, result)
+        except Exception:
+            # no room for it (or something that can't be stored): it goes
+            # back pickled, like the results without arrays
+            os.unlink(stored)
+            parsed.append((path, result, None, None))
+            continue
+        parsed.append((path, None, stored, None))
+    return parsed
+
+
+def _has_arrays(value) -> bool:
+    if isinstance(value, dict):
+        return any(_has_arrays(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_has_arrays(item) for item in value)
+    return is_array(value)
@@ -1,101 +1,687 @@
+import gzip
 import logging
+import mmap
 
 from typing import Any
 from typing import Dict
+from typing import Iterator
 from typing import List
+from typing import Optional
 
+from .exceptions import InvalidListError
 from .exceptions import UnexpectedCharacterError
 from .exceptions import UnexpectedTokenError
-from .tokenizer import FoamLexer
-from .sly.lex import LexError
+from .numeric import binary_readers
+from .numeric import list_end
+from .numeric import parallel_readers
+from .numeric import read_labels
+from .numeric import read_scalars
+from .numeric import read_spherical_tensors
+from .numeric import read_symm_tensors
+from .numeric import read_tensors
+from .numeric import read_vectors
+from .scanner import DICT_END
+from .scanner import DICT_START
+from .scanner import END
+from .scanner import IDENTIFIER
+from .scanner import INCLUDE
+from .scanner import LIST_END
+from .scanner import LIST_START
+from .scanner import NAMES
+from .scanner import QUOTED_STRING
+from .scanner import scan
+from .scanner import skip_block
 
 
 logger = logging.getLogger(__name__)
 
+# How much of a file is read at a time when looking for its header; enough
+# for the usual banner and header in a single read.
+HEADER_BLOCK_SIZE = 4096
 
-def parse(input: str) -> Dict[str, Any]:
-    """Parse a Foam content, returning the dictionary with the data."""
-    lexer = FoamLexer()
-    tokens = lexer.tokenize(input)
-    return proc_dict(tokens)
+# Files starting with this are gzip compressed (e.g. written with
+# ``writeCompression on``), and are decompressed in blocks of this size.
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_BLOCK_SIZE = 1 << 20
 
+# The events of ``iterparse``.
+START_DICT = "start_dict"
+END_DICT = "end_dict"
+START_LIST = "start_list"
+END_LIST = "end_list"
+ITEM = "item"
+ENTRY = "entry"
 
-def proc_dict(tokens) -> Dict[str, Any]:
-    result = {}
+# Typed lists that are read in bulk, as long as they are prefixed by their
+# size (e.g. ``nonuniform List<scalar> 3 (1 2 3)``). Each reader receives the
+# text, the position right after the opening "(" and the size, and returns
+# the value and the position after the closing ")" (or None if the list must
+# go through the generic path).
+LIST_READERS = {
+    "List<scalar>": read_scalars,
+    "List<label>": read_labels,
+}
+
+# Lists of fixed width tuples, read into (N, width) arrays when parsing with
+# ``tensors=True``.
+TENSOR_READERS = {
+    **LIST_READERS,
+    "List<vector>": read_vectors,
+    "List<symmTensor>": read_symm_tensors,
+    "List<tensor>": read_tensors,
+    "List<sphericalTensor>": read_spherical_tensors,
+}
+
+
+# Sized lists of numbers (or tuples of numbers), which can be skipped by
+# only looking for their end, whatever the readers are.
+NUMERIC_LISTS = frozenset(TENSOR_READERS)
+
+
+def parse(
+    input: str,
+    tensors: bool = False,
+    lazy: bool = False,
+    select: Optional[List[str]] = None,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """Parse a Foam content, returning the dictionary with the data.
+
+    With ``tensors``, sized lists of vectors and tensors are returned as
+    ``(N, 3)``, ``(N, 6)`` and ``(N, 9)`` arrays instead of lists of lists.
+
+    With ``lazy``, the content is only skimmed and the result is a mapping
+    that parses each entry when it is accessed (see ``foamparser.lazy``).
+
+    With ``select``, only the entries in the given key paths (like
+    ``"functions/FP/type"``, or ``"boundaryField/*/type"`` with patterns) are
+    parsed, skipping everything else.
+
+    With ``workers``, the bodies of huge numeric lists are split in chunks
+    that are converted in that many processes (see ``numeric.region_to_array``).
+    """
+    readers = parallel_readers(TENSOR_READERS if tensors else LIST_READERS, workers)
+    if select is not None:
+        return proc_select(input, select, readers)
+    if lazy:
+        return proc_lazy(input, readers)
+    return proc_dict(input, scan(input), readers)
+
+
+def parse_file(
+    path: str,
+    tensors: bool = False,
+    lazy: bool = False,
+    select: Optional[List[str]] = None,
+    cache_dir: Optional[str] = None,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """Parse a Foam file, returning the dictionary with the data.
+
+    The file is memory mapped and processed as bytes, decoding only the
+    pieces that become keys and values. If its header says it was written
+    with ``format binary``, the payload of each sized list is returned as an
+    array over the mapping, without decoding or copying it.
+
+    Gzip compressed files are detected by their contents; unless ``lazy``,
+    ``select`` or ``workers`` are used, they are decompressed in blocks while
+    parsing (see ``parse_gzip``).
+
+    ``tensors``, ``lazy``, ``select`` and ``workers`` work like in ``parse``.
+
+    With ``cache_dir``, the result is kept in that directory and loaded from
+    there while the file doesn't change (see ``foamparser.cache.DiskCache``);
+    lazy results are never cached.
+    """
+    if cache_dir is not None and not lazy:
+        from .cache import DiskCache
+
+        return DiskCache(cache_dir).parse_file(path, tensors, select, workers)
+    data = map_file(path)
+    if data[: len(GZIP_MAGIC)] == GZIP_MAGIC:
+        if not lazy and select is None:
+            return parse_gzip(path, tensors, workers)
+        data = gzip.decompress(data)
+    header = proc_header(data)
+    readers = file_readers(header, tensors, workers)
+    binary = header.get("format") == "binary"
+    if select is not None:
+        return proc_select(data, select, readers, binary)
+    if lazy:
+        return proc_lazy(data, readers, binary)
+    return proc_dict(data, scan(data), readers)
+
+
+def iterparse(
+    input: str, tensors: bool = False, workers: int = 1
+) -> Iterator[tuple]:
+    """Parse a Foam content as a stream of ``(event, key_path, value)``
+    events, without building the result (see ``proc_events``).
+
+    ``tensors`` and ``workers`` work like in ``parse``.
+    """
+    readers = parallel_readers(TENSOR_READERS if tensors else LIST_READERS, workers)
+    return proc_events(input, scan(input), readers)
+
+
+def iterparse_file(
+    path: str, tensors: bool = False, workers: int = 1
+) -> Iterator[tuple]:
+    """Parse a Foam file as a stream of events, like ``iterparse``.
+
+    The file is memory mapped (gzip compressed files are decompressed whole).
+    """
+    data = read_contents(path)
+    readers = file_readers(proc_header(data), tensors, workers)
+    return proc_events(data, scan(data), readers)
+
+
+def parse_gzip(path: str, tensors: bool = False, workers: int = 1) -> Dict[str, Any]:
+    """Parse a gzip compressed file, decompressing it in blocks.
+
+    ascii contents are fed to an ``IncrementalParser`` as they come out of
+    the decompressor, which converts the bodies of numeric lists as they
+    arrive; so, besides the result, only about a block of the content is held
+    in memory. Binary ones, and any content converted by ``workers``, are
+    decompressed whole, so their lists can be read in bulk.
+
+    A big list that turns out not to be numeric can't go back to the generic
+    path once its start was converted; the content is then decompressed
+    whole and parsed again, so the result is the same as for the
+    decompressed file.
+    """
+    from .incremental import IncrementalParser
+
+    with gzip.open(path, "rb") as infile:
+        block = infile.read(GZIP_BLOCK_SIZE)
+        header = proc_header(block, partial=bool(block))
+        if header is not None and header.get("format") != "binary" and workers <= 1:
+            parser = IncrementalParser(tensors)
+            try:
+                while block:
+                    parser.feed(block)
+                    block = infile.read(GZIP_BLOCK_SIZE)
+                return parser.close()
+            except InvalidListError:
+                del parser
+                infile.seek(0)
+                block = b""
+        data = block + infile.read()
+    readers = file_readers(proc_header(data), tensors, workers)
+    return proc_dict(data, scan(data), readers)
+
+
+def proc_lazy(text, readers, binary: bool = False):
+    # lazy parsing is built on top of this module
+    from .lazy import LazyDict
+    from .lazy import skim
+
+    return LazyDict(text, skim(text, scan(text), readers, binary), readers)
+
+
+def proc_select(text, paths: List[str], readers, binary: bool = False):
+    from .lazy import select
+
+    paths = [tuple(path.split("/")) for path in paths]
+    return select(text, scan(text), paths, readers, binary)
+
+
+def map_file(path: str):
+    """Map the contents of a file in memory (read only).
+
+    The mapping stays open as long as something (e.g. an array over a binary
+    payload) still refers to it.
+    """
+    with open(path, "rb") as infile:
+        try:
+            return mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            return b""
+
+
+def read_contents(path: str):
+    """The contents of a file, mapped in memory (or decompressed, if the file
+    is gzip compressed)."""
+    data = map_file(path)
+    if data[: len(GZIP_MAGIC)] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    return data
+
+
+def open_file(path: str):
+    """Open a file for reading as bytes, decompressing it if needed."""
+    with open(path, "rb") as infile:
+        compressed = infile.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def file_readers(header: Dict[str, Any], tensors: bool = False, workers: int = 1):
+    """The list readers for a content with the given ``FoamFile`` header."""
+    if header.get("format") == "binary":
+        return binary_readers(header.get("arch", ""))
+    return parallel_readers(TENSOR_READERS if tensors else LIST_READERS, workers)
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Read only the ``FoamFile`` header of a file.
+
+    The file is read in small blocks, and only until the end of the header,
+    so this costs about one small read per file. Returns an empty dictionary
+    if the file doesn't start with a header.
+    """
+    data = b""
+    with open_file(path) as infile:
+        while True:
+            block = infile.read(HEADER_BLOCK_SIZE)
+            data += block
+            header = proc_header(data, partial=bool(block))
+            if header is not None:
+                return header
+
+
+def proc_header(text, partial: bool = False) -> Dict[str, Any]:
+    """Process the ``FoamFile`` dictionary, if the content starts with one.
+
+    With ``partial`` (the text is only the beginning of the content), returns
+    None if the text ends before the header does.
+    """
+    tokens = scan(text, 0, partial)
+    for kind, start, end in tokens:
+        if kind != IDENTIFIER or token_value(text, start, end) != "FoamFile":
+            return {}
+        kind, start, end = next(tokens, (None, 0, 0))
+        if kind is None and partial:
+            return None
+        if kind != DICT_START:
+            return {}
+        try:
+            close = skip_block(text, end)
+        except UnexpectedCharacterError:
+            if partial:
+                return None
+            raise
+        return proc_dict(text, scan(text, end, stop=close))
+    return None if partial else {}
+
+
+def token_value(text, start: int, end: int) -> str:
+    value = text[start:end]
+    if not isinstance(value, str):
+        value = value.decode()
+    return value
+
+
+def include_argument(text, tokens, start: int, end: int):
+    """Read the include directive at ``text[start:end]`` and its argument.
+
+    The argument is the token after the directive (a file name, with its
+    quotes) or, for ``#includeFunc``, the rest of the line (as the function
+    can have arguments, like ``patchAverage(name=inlet, fields=(p U))``).
+    Returns the directive and the argument.
+    """
+    directive = token_value(text, start, end)
+    if directive == "#includeFunc":
+        stop = text.find("\n" if isinstance(text, str) else b"\n", end)
+        if stop < 0:
+            stop = len(text)
+        tokens.send(stop)
+        return directive, token_value(text, end, stop).strip().rstrip(";").strip()
+    _kind, start, end = next(tokens)
+    return directive, token_value(text, start, end)
+
+
+def proc_dict(
+    text: str, tokens, readers=LIST_READERS, include=None
+) -> Dict[str, Any]:
+    """Process the entries of a dictionary, until its end.
+
+    Includes are recorded (with their argument as it is in the content)
+    under ``"#includes"``; with ``include``, they are resolved by calling it
+    with the dictionary so far, the directive and the argument, instead.
+    """
+    return proc_nested(text, tokens, {}, readers, include)
+
+
+def proc_typed_list(
+    text: str,
+    tokens,
+    values: List[Any],
+    start: int,
+    readers=LIST_READERS,
+    include=None,
+) -> Any:
+    """Process a list, reading it in bulk if the values before it ask for it."""
+    read = read_typed_list(text, values, start, readers)
+    if read is not None:
+        value, end = read
+        tokens.send(end)
+        return value
+    return proc_list(text, tokens, readers, include)
+
+
+def read_typed_list(text: str, values: List[Any], start: int, readers):
+    """Read a list in bulk, if the values before it are a type with a reader
+    and a size; returns the value and the position after it, or None."""
+    if len(values) >= 2 and isinstance(values[-2], str):
+        reader = readers.get(values[-2])
+        if reader is not None and isinstance(values[-1], str):
+            return reader(text, start, values[-1])
+    return None
+
+
+def skip_list(
+    text, start: int, list_type, count, readers, binary: bool = False
+) -> int:
+    """Find the position right after the list opened right before ``start``,
+    without reading it.
+
+    ``list_type`` and ``count`` are the values before the list (None if
+    there aren't any). Sized numeric lists are skipped by looking for their
+    end (binary ones, through their reader); anything else, by matching
+    brackets.
+    """
+    if isinstance(list_type, str) and isinstance(count, str) and count.isdigit():
+        if binary:
+            reader = readers.get(list_type)
+            if reader is not None:
+                return reader(text, start, count)[1]
+        elif list_type in NUMERIC_LISTS or list_type in readers:
+            close = list_end(text, start, int(count))
+            if close >= 0:
+                return close + 1
+    return skip_block(text, start)
+
+
+def proc_list(text: str, tokens, readers=LIST_READERS, include=None) -> List[Any]:
+    """Process the items of a list, until its end."""
+    return proc_nested(text, tokens, [], readers, include)
+
+
+def proc_nested(text: str, tokens, root, readers=LIST_READERS, include=None):
+    """Process the content of a dictionary or a list (``root``), until its end.
+
+    The dictionaries and lists inside it are kept in an explicit stack,
+    instead of being processed by recursive calls; so nesting costs no
+    Python frames, and has no limit. Dictionaries and lists have a loop of
+    their own, switched when going into (or back to) the other kind.
+    """
+    # the enclosing dictionaries/lists, as ``(result, entry, values)``
+    stack = []
+    result = root
     entry = None
     values = []
-    try:
-        for token in tokens:
-            logger.debug(
-                "[D] token=%s, value=%s (entry=%s)", token.type, token.value, entry
-            )
-
-            if entry is None and token.type in [
-                "LIST_START",
-                "DICT_START",
-                "END",
-            ]:
-                # To start a list, or dict, or to complete the values of something,
-                # we need to have started something already.
-                raise UnexpectedTokenError(token.value)
-            elif token.type == "LIST_END":
-                # we don't expect the end of a list while processing a dictionary
-                raise UnexpectedTokenError(token.value)
-            elif token.type == "DICT_END":
-                break
-            elif token.type == "IDENTIFIER":
-                if entry is None:
-                    entry = token.value
+    decode = not isinstance(text, str)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # the ";" after an include is optional
+    included = False
+    while True:
+        if isinstance(result, dict):
+            for kind, start, end in tokens:
+                if debug:
+                    logger.debug(
+                        "[D] token=%s, value=%s (entry=%s)",
+                        NAMES[kind],
+                        token_value(text, start, end),
+                        entry,
+                    )
+
+                if kind == IDENTIFIER:
+                    value = text[start:end]
+                    if decode:
+                        value = value.decode()
+                    if entry is None:
+                        entry = value
+                    else:
+                        values.append(value)
+                elif kind == END:
+                    if entry is None:
+                        if included:
+                            included = False
+                            continue
+                        raise UnexpectedTokenError(token_value(text, start, end))
+                    if len(values) == 1:
+                        # this is just to make things prettier
+                        result[entry] = values[0]
+                    else:
+                        result[entry] = values
+                    entry = None
+                    values = []
+                    included = False
+                elif kind == QUOTED_STRING:
+                    value = text[start + 1 : end - 1]
+                    if decode:
+                        value = value.decode()
+                    if entry is None:
+                        entry = value
+                    else:
+                        values.append(value)
+                elif kind == LIST_START:
+                    if entry is None:
+                        # To start a list, or dict, or to complete the values
+                        # of something, we need to have started something
+                        # already.
+                        raise UnexpectedTokenError(token_value(text, start, end))
+                    read = read_typed_list(text, values, end, readers)
+                    if read is not None:
+                        values.append(read[0])
+                        tokens.send(read[1])
+                        continue
+                    inner = []
+                    values.append(inner)
+                    stack.append((result, entry, values))
+                    result = inner
+                    break
+                elif kind == DICT_START:
+                    if entry is None:
+                        raise UnexpectedTokenError(token_value(text, start, end))
+                    inner = {}
+                    result[entry] = inner
+                    stack.append((result, None, []))
+                    result = inner
+                    entry = None
+                    values = []
+                    included = False
+                elif kind == DICT_END:
+                    if not stack:
+                        return root
+                    result, entry, values = stack.pop()
+                    included = False
+                    if not isinstance(result, dict):
+                        break
+                elif kind == LIST_END:
+                    # we don't expect the end of a list while processing a
+                    # dictionary
+                    raise UnexpectedTokenError(token_value(text, start, end))
+                elif kind == INCLUDE:
+                    directive, argument = include_argument(text, tokens, start, end)
+                    if include is None:
+                        if "#includes" not in result:
+                            result["#includes"] = []
+                        result["#includes"].append(argument)
+                    else:
+                        include(result, directive, argument)
+                    included = True
+            else:
+                return root
+        else:
+            for kind, start, end in tokens:
+                if debug:
+                    logger.debug(
+                        "[L] token=%s, value=%s",
+                        NAMES[kind],
+                        token_value(text, start, end),
+                    )
+
+                if kind == IDENTIFIER:
+                    value = text[start:end]
+                    if decode:
+                        value = value.decode()
+                    result.append(value)
+                elif kind == LIST_END:
+                    if not stack:
+                        return root
+                    result, entry, values = stack.pop()
+                    if isinstance(result, dict):
+                        break
+                elif kind == QUOTED_STRING:
+                    value = text[start + 1 : end - 1]
+                    if decode:
+                        value = value.decode()
+                    result.append(value)
+                elif kind == LIST_START:
+                    inner = []
+                    result.append(inner)
+                    stack.append((result, None, values))
+                    result = inner
+                elif kind == DICT_START:
+                    inner = {}
+                    result.append(inner)
+                    stack.append((result, None, values))
+                    result = inner
+                    entry = None
+                    values = []
+                    included = False
+                    break
+                elif kind in (DICT_END, END):
+                    raise UnexpectedTokenError(token_value(text, start, end))
                 else:
-                    values.append(token.value)
-            elif token.type == "QUOTED_STRING":
+                    raise UnexpectedCharacterError(
+                        token_value(text, start, end), start
+                    )
+            else:
+                return root
+
+
+def proc_events(text, tokens, readers=LIST_READERS) -> Iterator[tuple]:
+    """Process a content into ``(event, key_path, value)`` events.
+
+    Key paths are tuples of keys, with the indexes of the items in lists
+    (like ``("boundaryField", "inlet", "type")`` or ``("vertices", 3, 0)``).
+    The events are:
+
+    - ``START_DICT``/``END_DICT``: a dictionary starts/ends (the whole
+      content is the dictionary at ``()``, with no events of its own);
+    - ``START_LIST``/``END_LIST``: a list starts/ends; for a list in an
+      entry, the value of ``START_LIST`` is the values before it (like
+      ``["nonuniform", "List<word>", "2"]``), for a list in a list, None;
+    - ``ITEM``: a value in a list;
+    - ``ENTRY``: an entry with its value, like ``parse`` gives it; values
+      already given in ``START_LIST`` aren't repeated, and entries that had
+      nothing but lists don't have this event. Includes are ``ENTRY`` events
+      of ``"#includes"``, with the argument as value.
+
+    Sized lists that have a reader are read in bulk, as values of their
+    entry. Only the dictionaries and lists around the current position are
+    kept, so memory doesn't grow with the content.
+
+    Sending anything but None into the generator (``events.send(True)``)
+    right after a ``START_DICT`` or ``START_LIST`` skips over that dictionary
+    or list, without producing its events (nor its end); the send itself
+    returns None.
+    """
+    # the enclosing dictionaries/lists, as
+    # ``(path, in_dict, entry, values, streamed, index)``
+    stack = []
+    path = ()
+    in_dict = True
+    entry = None
+    values = []
+    # whether the entry had lists, given as events
+    streamed = False
+    # the index of the next item, in lists
+    index = 0
+    decode = not isinstance(text, str)
+    after_include = False
+    for kind, start, end in tokens:
+        included, after_include = after_include, False
+
+        if kind == IDENTIFIER or kind == QUOTED_STRING:
+            if kind == IDENTIFIER:
+                value = text[start:end]
+            else:
+                value = text[start + 1 : end - 1]
+            if decode:
+                value = value.decode()
+            if not in_dict:
+                if (yield ITEM, path + (index,), value):
+                    yield None
+                index += 1
+            elif entry is None:
+                entry = value
+            else:
+                values.append(value)
+        elif kind == END:
+            if not in_dict:
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if entry is None:
+                if included:
+                    continue
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if values or not streamed:
+                value = values[0] if len(values) == 1 else values
+                if (yield ENTRY, path + (entry,), value):
+                    yield None
+            entry = None
+            values = []
+            streamed = False
+        elif kind == LIST_START or kind == DICT_START:
+            if in_dict:
                 if entry is None:
-                    entry = token.value[1:-1]
-                else:
-                    values.append(token.value[1:-1])
-            elif token.type == "LIST_START":
-                values.append(proc_list(tokens))
-            elif token.type == "DICT_START":
-                inner_dict = proc_dict(tokens)
-                result[entry] = inner_dict
-                values = []
-                entry = None
-            elif token.type == "END":
-                if len(values) == 1:
-                    # this is just to make things prettier
-                    result[entry] = values[0]
+                    raise UnexpectedTokenError(token_value(text, start, end))
+                if kind == LIST_START:
+                    read = read_typed_list(text, values, end, readers)
+                    if read is not None:
+                        values.append(read[0])
+                        tokens.send(read[1])
+                        continue
+                inner = path + (entry,)
+            else:
+                inner = path + (index,)
+                index += 1
+
+            if kind == LIST_START:
+                before = values if in_dict else None
+                skip = yield START_LIST, inner, before
+                if in_dict:
+                    values = []
+                    streamed = True
+            else:
+                skip = yield START_DICT, inner, None
+                if in_dict:
+                    entry = None
+                    values = []
+                    streamed = False
+            if skip:
+                yield None
+                if kind == LIST_START and in_dict and len(before) >= 2:
+                    position = skip_list(text, end, before[-2], before[-1], readers)
                 else:
-                    result[entry] = values
-                entry = None
-                values = []
-            elif token.type == "INCLUDE":
-                filename = next(tokens).value
-                _end = next(tokens)
-                if "#includes" not in result:
-                    result["#includes"] = []
-                result["#includes"].append(filename)
-    except LexError as exc:
-        raise UnexpectedCharacterError(exc.text[:10], exc.error_index)
-
-    return result
-
-
-def proc_list(tokens) -> List[Any]:
-    result = []
-    for token in tokens:
-        logger.debug("[L] token=%s, value=%s", token.type, token.value)
-        if token.type in ["DICT_END", "END"]:
-            raise UnexpectedTokenError(token.value)
-        elif token.type == "IDENTIFIER":
-            result.append(token.value)
-        elif token.type == "DICT_START":
-            result.append(proc_dict(tokens))
-        elif token.type == "LIST_START":
-            result.append(proc_list(tokens))
-        elif token.type == "QUOTED_STRING":
-            result.append(token.value[1:-1])
-        elif token.type == "LIST_END":
-            break
-        else:
-            raise UnexpectedCharacterError(token.value, token.type)
-    return result
+                    position = skip_block(text, end)
+                tokens.send(position)
+                continue
+
+            stack.append((path, in_dict, entry, values, streamed, index))
+            path = inner
+            in_dict = kind == DICT_START
+            entry = None
+            values = []
+            streamed = False
+            index = 0
+        elif kind == DICT_END or kind == LIST_END:
+            if in_dict != (kind == DICT_END):
+                raise UnexpectedTokenError(token_value(text, start, end))
+            if not stack:
+                break
+            if (yield END_DICT if in_dict else END_LIST, path, None):
+                yield None
+            path, in_dict, entry, values, streamed, index = stack.pop()
+        elif kind == INCLUDE:
+            if not in_dict:
+                raise UnexpectedCharacterError(token_value(text, start, end), start)
+            _directive, argument = include_argument(text, tokens, start, end)
+            if (yield ENTRY, path + ("#includes",), argument):
+                yield None
+            after_include = True
@@ -0,0 +1,143 @@
+"""Lookup of entries with regular expression keys.
+
+OpenFOAM dictionaries can have keys that are regular expressions, like
+``".*Wall"`` or ``"(U|k|epsilon)Final"``, which apply to every name they
+match. A ``PatternDict`` looks names up like OpenFOAM does: a key equal to
+the name comes first; otherwise the name is matched (as a whole) against the
+patterns, with the last one in the dictionary winning.
+
+All the patterns of a dictionary are compiled once into a single
+alternation (the last pattern first), and the key found for each name is
+kept, so looking up many names costs about a dictionary lookup each. A
+leading ``(?i)`` (as in OpenFOAM's case insensitive keys) becomes a group
+of its own, so it still applies only to its pattern; patterns that can't be
+put together with others (like those with backreferences, which would be
+renumbered) are matched on their own, in their place.
+"""
+
+import re
+
+from collections.abc import Mapping
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+# Keys with any of these are patterns; a "." alone isn't enough, as it is
+# also found in plain names (like ``U.orig``).
+_META = frozenset("()|*+?[]{}^$\\")
+# Flags for the whole pattern, at its start.
+_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+# Backreferences (and conditions) to the groups of the pattern.
+_REFERENCES = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+def is_pattern(key: str) -> bool:
+    """Check if a key is a regular expression."""
+    return any(char in _META for char in key)
+
+
+class PatternDict(Mapping):
+    """A read-only view of a parsed dictionary, where regular expression
+    keys match the names looked up in it.
+
+    Iterating goes over the keys as they are in the dictionary. Dictionary
+    values are also given as ``PatternDict``.
+    """
+
+    def __init__(self, entries: Dict[str, Any]):
+        self._entries = entries
+        self._keys = {}
+        self._views = {}
+
+        patterns = []
+        for key in entries:
+            if not is_pattern(key):
+                continue
+            try:
+                re.compile(key)
+            except re.error:
+                # not a valid pattern, so just a name
+                continue
+            patterns.append(key)
+        # the last pattern in the dictionary is the first one tried, so it
+        # wins when several match; as ``(match, keys)``, for runs of patterns
+        # put together in an alternation and for patterns on their own
+        self._matchers = []
+        run = []
+        for pattern in reversed(patterns):
+            if _REFERENCES.search(pattern) is None:
+                run.append(pattern)
+                continue
+            self._add_run(run)
+            run = []
+            self._matchers.append((re.compile(pattern).fullmatch, [pattern]))
+        self._add_run(run)
+
+    def _add_run(self, patterns) -> None:
+        if len(patterns) > 1:
+            alternatives = "|".join(
+                f"(?P<_{index}>{_scoped(pattern)})"
+                for index, pattern in enumerate(patterns)
+            )
+            try:
+                self._matchers.append((re.compile(alternatives).fullmatch, patterns))
+                return
+            except re.error:
+                # like groups with the same name in different patterns
+                pass
+        for pattern in patterns:
+            self._matchers.append((re.compile(pattern).fullmatch, [pattern]))
+
+    def key(self, name: str) -> Optional[str]:
+        """The key that applies to ``name`` (None if there's none)."""
+        if name in self._entries:
+            return name
+        try:
+            return self._keys[name]
+        except KeyError:
+            pass
+
+        key = None
+        for match, patterns in self._matchers:
+            found = match(name)
+            if found is None:
+                continue
+            if len(patterns) == 1:
+                key = patterns[0]
+            else:
+                key = patterns[int(found.lastgroup[1:])]
+            break
+        self._keys[name] = key
+        return key
+
+    def __getitem__(self, name: str):
+        key = self.key(name)
+        if key is None:
+            raise KeyError(name)
+        value = self._entries[key]
+        if isinstance(value, dict):
+            if key not in self._views:
+                self._views[key] = PatternDict(value)
+            return self._views[key]
+        return value
+
+    def __contains__(self, name) -> bool:
+        return self.key(name) is not None
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"PatternDict({self._entries!r})"
+
+
+def _scoped(pattern: str) -> str:
+    """Turn the flags at the start of a pattern into a group with them, so
+    the pattern can be part of an alternation."""
+    match = _FLAGS.match(pattern)
+    if match is None:
+        return pattern
+    return f"(?{match.group(1)}:{pattern[match.end():]})"
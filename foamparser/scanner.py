@@ -0,0 +1,253 @@
+"""Single pass scanner for Foam content.
+
+The scanner walks the input once, dispatching on the first character of each
+lexeme, and yields plain ``(kind, start, end)`` tuples instead of token
+objects; the value of a token is only materialised (by slicing the input)
+when the parser actually needs it. Comments and whitespace are skipped
+(unless comments are asked for).
+
+The consumer can make the scanner jump over a region it already processed by
+sending the new position into the generator (``tokens.send(position)``); the
+send itself returns ``None`` and scanning resumes at that position on the
+next iteration.
+"""
+
+import re
+
+from .exceptions import UnexpectedCharacterError
+
+
+DICT_START = 0
+DICT_END = 1
+LIST_START = 2
+LIST_END = 3
+END = 4
+INCLUDE = 5
+QUOTED_STRING = 6
+IDENTIFIER = 7
+# only with ``scan(..., comments=True)``
+COMMENT = 8
+
+NAMES = (
+    "DICT_START",
+    "DICT_END",
+    "LIST_START",
+    "LIST_END",
+    "END",
+    "INCLUDE",
+    "QUOTED_STRING",
+    "IDENTIFIER",
+    "COMMENT",
+)
+
+_IDENTIFIER_CHARS = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_~.-<>"
+)
+_IDENTIFIER = r"[a-zA-Z0-9_~\.<>-]+"
+_WHITESPACE = r"[ \t\r\n]+"
+# ``$name``, ``$:scoped.name``, ``$../name``, ``${..scope/name}``
+_VARIABLE = r"\$(\{[^{}\n]*\}|[a-zA-Z0-9_~\.<>:/-]*)"
+_PUNCTUATION = {
+    "{": DICT_START,
+    "}": DICT_END,
+    "(": LIST_START,
+    ")": LIST_END,
+    ";": END,
+}
+
+
+def _syntax(encode):
+    """Build the lookup tables for scanning either text or bytes.
+
+    Indexing bytes gives integers instead of characters, so the single
+    characters are encoded with ``ord`` for those.
+    """
+    char = ord if encode else str
+    literal = str.encode if encode else str
+    return (
+        frozenset(char(c) for c in _IDENTIFIER_CHARS),
+        frozenset(char(c) for c in " \t\r\n"),
+        {char(c): kind for c, kind in _PUNCTUATION.items()},
+        re.compile(literal(_IDENTIFIER)).match,
+        re.compile(literal(_WHITESPACE)).match,
+        re.compile(literal(_VARIABLE)).match,
+        char("$"),
+        char('"'),
+        char("/"),
+        char("#"),
+        literal('"'),
+        literal("\n"),
+        literal("//"),
+        literal("/*"),
+        literal("*/"),
+        literal("#include"),
+        literal("${"),
+    )
+
+
+_TEXT_SYNTAX = _syntax(encode=False)
+_BYTES_SYNTAX = _syntax(encode=True)
+
+
+def snippet(text, pos: int) -> str:
+    """The text around a position, for error messages."""
+    value = text[pos : pos + 10]
+    if not isinstance(value, str):
+        value = value.decode(errors="replace")
+    return value
+
+
+def scan(
+    text, pos: int = 0, partial: bool = False, stop=None, comments: bool = False
+):
+    """Yield ``(kind, start, end)`` for every token in the text.
+
+    The text can also be ``bytes`` (or any buffer with ``find`` and slicing,
+    like a ``mmap``), in which case the positions are byte offsets.
+
+    With ``partial``, the text is just the beginning of the content, so the
+    scanner stops (instead of raising an error) at a token or comment that
+    may continue past its end.
+
+    With ``stop``, only the text up to that position is scanned.
+
+    With ``comments``, comments are also yielded, as ``COMMENT`` tokens.
+    """
+    (
+        identifier_chars,
+        whitespace_chars,
+        punctuation,
+        match_identifier,
+        match_whitespace,
+        match_variable,
+        dollar,
+        quote,
+        slash,
+        hash,
+        quote_str,
+        newline,
+        line_comment,
+        block_comment,
+        block_comment_end,
+        include,
+        braced_variable,
+    ) = (_TEXT_SYNTAX if isinstance(text, str) else _BYTES_SYNTAX)
+    length = len(text) if stop is None else stop
+    find = text.find
+
+    while pos < length:
+        char = text[pos]
+        if char in whitespace_chars:
+            pos = match_whitespace(text, pos, length).end()
+            continue
+        elif char in identifier_chars:
+            kind = IDENTIFIER
+            end = match_identifier(text, pos, length).end()
+            if end == length and partial:
+                return
+        elif char in punctuation:
+            kind = punctuation[char]
+            end = pos + 1
+        elif char == dollar:
+            # variables are identifiers, expanded later (if at all)
+            kind = IDENTIFIER
+            end = match_variable(text, pos, length).end()
+            if end == length and partial:
+                return
+            if end == pos + 1 and text[pos : pos + 2] == braced_variable:
+                # a "${" without its "}"
+                if partial and find(newline, pos) < 0:
+                    return
+                raise UnexpectedCharacterError(snippet(text, pos), pos)
+        elif char == quote:
+            end = find(quote_str, pos + 1)
+            if end < 0 and partial:
+                return
+            if end < 0:
+                raise UnexpectedCharacterError(snippet(text, pos), pos)
+            kind = QUOTED_STRING
+            end += 1
+        elif char == slash and text[pos : pos + 2] == line_comment:
+            end = find(newline, pos)
+            if end < 0 and partial:
+                return
+            end = length if end < 0 else end
+            if not comments:
+                pos = end
+                continue
+            kind = COMMENT
+        elif char == slash and text[pos : pos + 2] == block_comment:
+            end = find(block_comment_end, pos + 2)
+            if end < 0 and partial:
+                return
+            if end < 0:
+                raise UnexpectedCharacterError(snippet(text, pos), pos)
+            end += 2
+            if not comments:
+                pos = end
+                continue
+            kind = COMMENT
+        elif char == hash and text[pos : pos + 8] == include:
+            # also ``#includeIfPresent``, ``#includeEtc`` and ``#includeFunc``
+            kind = INCLUDE
+            end = match_identifier(text, pos + 1, length).end()
+            if end == length and partial:
+                return
+        elif partial and (
+            include.startswith(text[pos:]) or line_comment.startswith(text[pos:])
+        ):
+            return
+        else:
+            raise UnexpectedCharacterError(snippet(text, pos), pos)
+
+        jump = yield kind, pos, end
+        pos = end
+        if jump is not None:
+            pos = jump
+            yield None
+
+
+# Opening and closing brackets, strings and comments: all that matters when
+# skipping over a block.
+_BLOCK = r'([({])|([)}])|(")|(//)|(/\*)'
+_BLOCK_SYNTAX = (
+    (re.compile(_BLOCK).search, '"', "\n", "*/"),
+    (re.compile(_BLOCK.encode()).search, b'"', b"\n", b"*/"),
+)
+
+
+def skip_block(text, pos: int) -> int:
+    """Find the end of the list or dictionary opened right before ``pos``.
+
+    Only brackets, strings and comments are looked at, so the content is
+    skipped without producing any tokens. Returns the position right after
+    the closing bracket.
+    """
+    search, quote, newline, block_comment_end = _BLOCK_SYNTAX[
+        0 if isinstance(text, str) else 1
+    ]
+    start = pos - 1
+    depth = 1
+    while depth:
+        match = search(text, pos)
+        if match is None:
+            raise UnexpectedCharacterError(snippet(text, start), start)
+        found = match.lastindex
+        pos = match.end()
+        if found == 1:
+            depth += 1
+        elif found == 2:
+            depth -= 1
+            continue
+        elif found == 3:
+            end = text.find(quote, pos)
+            pos = end + 1
+        elif found == 4:
+            end = text.find(newline, pos)
+            pos = end + 1
+        else:
+            end = text.find(block_comment_end, pos)
+            pos = end + 2
+        if found > 2 and end < 0:
+            raise UnexpectedCharacterError(snippet(text, start), start)
+    return pos
@@ -0,0 +1,146 @@
+"""Expansion of ``$variable`` references.
+
+The parser keeps references as plain values (like ``"$internalField"``);
+``expand`` replaces them by the values they refer to, following OpenFOAM's
+lookup rules:
+
+- ``$name``: searched in the dictionary of the reference, then in the ones
+  around it, up to the top;
+- ``$.name``, ``$..name``, ``$...name``: in the dictionary of the reference,
+  in the one around it, and so on (without searching further up);
+- ``$:a.b`` and ``$/a/b``: from the top;
+- ``$a.b`` or ``$a/b``: an entry of a sub-dictionary;
+- ``${...}``: the same, with braces (like ``${..scope/name}``).
+
+A reference in the place of an entry name (``$defaults;``) brings the entries
+of the dictionary it refers to.
+
+Each referenced entry is expanded once, and everything that refers to it
+gets the same (expanded) object, not a copy; so, when changing an expanded
+result, changing a value shared by several entries changes all of them.
+"""
+
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+from .exceptions import UndefinedVariableError
+from .exceptions import VariableCycleError
+
+
+def expand(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand the references in a parsed result, returning a new result."""
+    return Expander(result).expand()
+
+
+class Expander:
+    """Expands the references of a result, keeping each expanded entry (by
+    key path), so it is expanded once, however many times it is referred."""
+
+    def __init__(self, root: Dict[str, Any]):
+        self.root = root
+        self._expanded = {}
+        # the entries being expanded, to detect cycles
+        self._active = set()
+
+    def expand(self) -> Dict[str, Any]:
+        return self._at(())
+
+    def _at(self, path: Tuple[str, ...]):
+        """The expanded value of the entry at ``path``."""
+        try:
+            return self._expanded[path]
+        except KeyError:
+            pass
+        if path in self._active:
+            raise VariableCycleError("/".join(path))
+
+        self._active.add(path)
+        try:
+            value = self._raw(path)
+            if isinstance(value, dict):
+                value = self._dict(value, path)
+            else:
+                value = self._value(value, path[:-1])
+        finally:
+            self._active.discard(path)
+        self._expanded[path] = value
+        return value
+
+    def _dict(self, node: Dict[str, Any], path: Tuple[str, ...]) -> Dict[str, Any]:
+        result = {}
+        for name, value in node.items():
+            if name[:1] == "$" and value == []:
+                # ``$name;`` brings the entries of another dictionary
+                target = self._at(self._resolve(name, path))
+                if not isinstance(target, dict):
+                    raise UndefinedVariableError(name)
+                result.update(target)
+            else:
+                result[name] = self._at(path + (name,))
+        return result
+
+    def _value(self, value, scope: Tuple[str, ...]):
+        """Expand the references in a value found in the dictionary at
+        ``scope``."""
+        if isinstance(value, str):
+            if value[:1] == "$" and len(value) > 1:
+                return self._at(self._resolve(value, scope))
+            return value
+        if isinstance(value, list):
+            return [self._value(item, scope) for item in value]
+        if isinstance(value, dict):
+            # dictionaries inside lists have no path of their own
+            return {name: self._value(item, scope) for name, item in value.items()}
+        return value
+
+    def _resolve(self, reference: str, scope: Tuple[str, ...]) -> Tuple[str, ...]:
+        """The key path of the entry a reference refers to."""
+        name = reference[1:]
+        if name[:1] == "{" and name[-1:] == "}":
+            name = name[1:-1]
+
+        if name[:1] == ":":
+            return self._existing(reference, (), _split(name[1:], "."))
+        if name[:1] == "/":
+            return self._existing(reference, (), _split(name, "/"))
+
+        dots = len(name) - len(name.lstrip("."))
+        name = name[dots:]
+        if dots:
+            base = scope[: max(len(scope) - (dots - 1), 0)]
+            return self._existing(reference, base, _split(name, "/", "."))
+
+        for level in range(len(scope), -1, -1):
+            for keys in ((name,), _split(name, "/", ".")):
+                if self._exists(scope[:level] + keys):
+                    return scope[:level] + keys
+        raise UndefinedVariableError(reference)
+
+    def _existing(self, reference: str, base, keys) -> Tuple[str, ...]:
+        if not self._exists(base + keys):
+            raise UndefinedVariableError(reference)
+        return base + keys
+
+    def _exists(self, path: Tuple[str, ...]) -> bool:
+        try:
+            self._raw(path)
+        except KeyError:
+            return False
+        return True
+
+    def _raw(self, path: Tuple[str, ...]):
+        node = self.root
+        for key in path:
+            if not isinstance(node, dict):
+                raise KeyError(key)
+            node = node[key]
+        return node
+
+
+def _split(name: str, *separators: str) -> Tuple[str, ...]:
+    """Split a scoped name with the first of the separators in it."""
+    for separator in separators:
+        if separator in name:
+            return tuple(key for key in name.split(separator) if key)
+    return (name,) if name else ()
@@ -0,0 +1,177 @@
+"""Watching files for changes, reporting what changed in them.
+
+A ``Watcher`` keeps the last result of each file. On each ``poll``, the
+files are checked with one ``os.scandir`` per directory, only the ones whose
+modification time, size or inode changed are parsed again, and their new
+result is compared with the previous one, giving a ``Change`` per key path
+that was added, removed or changed.
+"""
+
+import logging
+import os
+import time
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+
+from .exceptions import FoamError
+from .numeric import is_array
+from .numeric import numpy
+from .parser import parse_file
+
+
+logger = logging.getLogger(__name__)
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+class Change(NamedTuple):
+    """A change in a watched file.
+
+    ``key`` is the key path of the entry (like ``"solvers/p/tolerance"``),
+    or an empty string when the whole file appeared or disappeared.
+    """
+
+    file: str
+    kind: str
+    key: str
+    old: Any
+    new: Any
+
+
+class Watcher:
+    """Watch files, reparsing the ones that change.
+
+    The files are parsed when added, so the first ``poll`` only reports what
+    changed after that. Files that don't exist (yet) are reported as added
+    when they appear.
+    """
+
+    def __init__(self, paths: Iterable[str] = (), tensors: bool = False):
+        self.tensors = tensors
+        # directory -> {name: path}
+        self._directories = {}
+        self._stats = {}
+        self._results = {}
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str) -> None:
+        directory, name = os.path.split(os.path.abspath(path))
+        self._directories.setdefault(directory, {})[name] = path
+        stats = self._stat({directory: {name: path}})
+        self._update(path, stats[path])
+
+    def __getitem__(self, path: str) -> Dict[str, Any]:
+        """The last result of a file (None if it doesn't exist)."""
+        return self._results[path]
+
+    def poll(self) -> List[Change]:
+        """Check the files, returning what changed since the last check."""
+        changes = []
+        for path, stat in self._stat(self._directories).items():
+            if stat == self._stats[path]:
+                continue
+            old = self._results[path]
+            if not self._update(path, stat):
+                continue
+            new = self._results[path]
+            if old is None:
+                changes.append(Change(path, ADDED, "", None, new))
+            elif new is None:
+                changes.append(Change(path, REMOVED, "", old, None))
+            else:
+                changes.extend(
+                    Change(path, kind, key, old_value, new_value)
+                    for kind, key, old_value, new_value in diff(old, new)
+                )
+        return changes
+
+    def watch(self, interval: float = 1.0) -> Iterator[List[Change]]:
+        """Poll every ``interval`` seconds, yielding the changes."""
+        while True:
+            changes = self.poll()
+            if changes:
+                yield changes
+            time.sleep(interval)
+
+    def _stat(self, directories):
+        """Stat the files, one directory at a time."""
+        stats = {}
+        for directory, names in directories.items():
+            for path in names.values():
+                stats[path] = None
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        path = names.get(entry.name)
+                        if path is not None:
+                            info = entry.stat()
+                            stats[path] = (info.st_mtime_ns, info.st_size, info.st_ino)
+            except FileNotFoundError:
+                pass
+        return stats
+
+    def _update(self, path: str, stat) -> bool:
+        """Parse a file again; returns False if it couldn't be parsed (like
+        when it is being written), to try again in the next poll."""
+        if stat is None:
+            result = None
+        else:
+            try:
+                result = parse_file(path, tensors=self.tensors)
+            except (OSError, FoamError) as error:
+                logger.warning("Can't parse %s: %s", path, error)
+                self._stats.setdefault(path, None)
+                self._results.setdefault(path, None)
+                return False
+        self._stats[path] = stat
+        self._results[path] = result
+        return True
+
+
+def diff(old: Any, new: Any, key: str = "") -> List[tuple]:
+    """The differences between two results, as ``(kind, key, old, new)``.
+
+    Dictionaries are compared entry by entry; anything else (strings, lists,
+    arrays) is compared as a whole.
+    """
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        if same(old, new):
+            return []
+        return [(CHANGED, key, old, new)]
+
+    changes = []
+    for name, value in old.items():
+        path = f"{key}/{name}" if key else name
+        if name in new:
+            changes.extend(diff(value, new[name], path))
+        else:
+            changes.append((REMOVED, path, value, None))
+    for name, value in new.items():
+        if name not in old:
+            path = f"{key}/{name}" if key else name
+            changes.append((ADDED, path, None, value))
+    return changes
+
+
+def same(old: Any, new: Any) -> bool:
+    """Check if two values are the same (arrays included)."""
+    if is_array(old) or is_array(new):
+        if not (is_array(old) and is_array(new)):
+            return False
+        if numpy is not None:
+            return bool(numpy.array_equal(old, new))
+        # ``array`` and ``memoryview`` compare their items natively
+        return old == new
+    if isinstance(old, list) and isinstance(new, list):
+        return len(old) == len(new) and all(map(same, old, new))
+    if isinstance(old, dict) and isinstance(new, dict):
+        return not diff(old, new)
+    return type(old) is type(new) and old == new
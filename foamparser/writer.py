@@ -1,9 +1,12 @@
+import gzip
+
 from typing import Any
 from typing import Dict
 from typing import List
 
 
 from .exceptions import InvalidRootElementError
+from .numeric import is_array
 
 
 def write(input: Dict[str, Any]) -> str:
@@ -16,6 +19,52 @@ def write(input: Dict[str, Any]) -> str:
     return "\n".join(output)
 
 
+def write_file(path: str, input: Dict[str, Any], compress: bool = False) -> None:
+    """Write a Python dictionary into a Foam file.
+
+    The lines go to the file as they are produced; with ``compress``, the
+    file is gzip compressed along the way (OpenFOAM expects those files to
+    be named with a ``.gz`` suffix, which is up to the caller).
+    """
+    if not isinstance(input, dict):
+        raise InvalidRootElementError()
+
+    if compress:
+        outfile = gzip.open(path, "wt")
+    else:
+        outfile = open(path, "w")
+    with outfile:
+        lines = LineWriter(outfile)
+        proc_dict(input, lines, 0)
+        lines.flush()
+
+
+class LineWriter:
+    """Takes the place of the list of lines in ``proc_dict``, writing them to
+    a file instead (in batches, separated like ``write`` does)."""
+
+    BATCH_SIZE = 4096
+
+    def __init__(self, outfile):
+        self.outfile = outfile
+        self.lines = []
+        self.first = True
+
+    def append(self, line: str) -> None:
+        self.lines.append(line)
+        if len(self.lines) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.lines:
+            return
+        if not self.first:
+            self.outfile.write("\n")
+        self.first = False
+        self.outfile.write("\n".join(self.lines))
+        self.lines = []
+
+
 def proc_dict(input: Dict[str, Any], output: List[str], level: int):
     space = spacing(level)
     for entry, value in input.items():
@@ -48,6 +97,8 @@ def safe_value(value: str) -> str:
         # XXX I'm not quite sure if we should output anything anyway in this
         #     this case. For now, we are showing an empty string.
         return '""'
+    elif is_array(value):
+        return array_value(value)
     elif not isinstance(value, str):
         return value
 
@@ -58,3 +109,12 @@ def safe_value(value: str) -> str:
     ):
         return f'"{value}"'
     return value
+
+
+def array_value(value) -> str:
+    rows = value.tolist()
+    if rows and isinstance(rows[0], list):
+        items = " ".join("(" + " ".join(map(str, row)) + ")" for row in rows)
+    else:
+        items = " ".join(map(str, rows))
+    return f"( {items} )"
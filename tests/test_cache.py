@@ -0,0 +1,172 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser.cache import DiskCache
+from foamparser.cache import FileCache
+from foamparser.parser import parse_file
+
+
+def write(path, content, mtime_ns):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hits_and_misses(tmp_path):
+    """Checks if a file is only parsed again when it changes."""
+    path = tmp_path / "controlDict"
+    write(path, "a 1;", 1_000_000_000)
+    cache = FileCache()
+
+    assert cache.parse_file(str(path)) == {"a": "1"}
+    assert cache.parse_file(str(path)) == {"a": "1"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write(path, "a 2;", 2_000_000_000)
+    assert cache.parse_file(str(path)) == {"a": "2"}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_copy_on_read(tmp_path):
+    """Checks if changing a result doesn't change the cached one."""
+    path = tmp_path / "fvSolution"
+    path.write_text("solvers { p { tolerance 1e-6; } } values List<scalar> 2(1 2);")
+    cache = FileCache()
+
+    result = cache.parse_file(str(path))
+    result["solvers"]["p"]["tolerance"] = "0"
+
+    again = cache.parse_file(str(path))
+    assert again["solvers"]["p"]["tolerance"] == "1e-6"
+    assert again["values"][2].tolist() == [1.0, 2.0]
+
+
+def test_eviction(tmp_path):
+    """Checks if the least recently used files go away first."""
+    paths = []
+    for name in "abc":
+        path = tmp_path / name
+        path.write_text(f"{name} 1;")
+        paths.append(str(path))
+    # each result ({"a": "1"}) is 2 bytes
+    cache = FileCache(max_bytes=5)
+
+    cache.parse_file(paths[0])
+    cache.parse_file(paths[1])
+    cache.parse_file(paths[0])
+    cache.parse_file(paths[2])
+    assert cache.evictions == 1
+
+    cache.parse_file(paths[0])
+    assert cache.hits == 2
+    cache.parse_file(paths[1])
+    assert cache.misses == 4
+
+
+def test_result_size(tmp_path):
+    """Checks if the cache is charged the size of the results, not of the
+    files."""
+    import gzip
+
+    path = tmp_path / "p.gz"
+    content = f"a 1; b List<scalar> 1000({' 0' * 1000}); c 1;"
+    path.write_bytes(gzip.compress(content.encode()))
+    assert path.stat().st_size < 1000
+
+    cache = FileCache()
+    cache.parse_file(str(path))
+    # the keys, "1", "List<scalar>", "1000", the 1000 doubles and "1"
+    assert cache._size == 3 + 1 + 12 + 4 + 8000 + 1
+
+    # too big for the cache, even if the file isn't
+    cache = FileCache(max_bytes=4000)
+    cache.parse_file(str(path))
+    cache.parse_file(str(path))
+    assert (cache.hits, cache.misses, cache._size) == (0, 2, 0)
+    # only what was selected
+    cache.parse_file(str(path), select=["a"])
+    cache.parse_file(str(path), select=["a"])
+    assert (cache.hits, cache._size) == (1, 2)
+
+
+FIELD = """
+FoamFile { format ascii; class volVectorField; }
+internalField nonuniform List<vector> 2((1 2 3) (4 5 6));
+boundaryField { inlet { type fixedValue; value uniform (0 0 0); } }
+"""
+
+
+def test_disk_cache(tmp_path):
+    """Checks if results are stored and mapped back from the cache."""
+    path = tmp_path / "U"
+    write(path, FIELD, 1_000_000_000)
+    cache = DiskCache(str(tmp_path / "cache"))
+
+    expected = cache.parse_file(str(path), tensors=True)
+    result = cache.parse_file(str(path), tensors=True)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert result["boundaryField"] == expected["boundaryField"]
+    assert result["internalField"][:2] == ["nonuniform", "List<vector>"]
+    assert result["internalField"][3].tolist() == [[1, 2, 3], [4, 5, 6]]
+
+    # arrays are views over the cache file
+    values = result["internalField"][3]
+    readonly = getattr(values, "readonly", None)
+    if readonly is None:
+        readonly = not values.flags.writeable
+    assert readonly
+
+
+def test_disk_cache_changes(tmp_path):
+    """Checks if a cached result is dropped when the file changes."""
+    path = tmp_path / "controlDict"
+    write(path, "a 1;", 1_000_000_000)
+    assert parse_file(str(path), cache_dir=str(tmp_path / "cache")) == {"a": "1"}
+
+    write(path, "a 2;", 2_000_000_000)
+    assert parse_file(str(path), cache_dir=str(tmp_path / "cache")) == {"a": "2"}
+
+
+def test_disk_cache_hash(tmp_path):
+    """Checks if the hash check ignores the modification time."""
+    path = tmp_path / "controlDict"
+    write(path, "a 1;", 1_000_000_000)
+    cache = DiskCache(str(tmp_path / "cache"), check="hash")
+    cache.parse_file(str(path))
+
+    write(path, "a 1;", 2_000_000_000)
+    assert cache.parse_file(str(path)) == {"a": "1"}
+    assert cache.hits == 1
+
+
+def test_disk_cache_invalid(tmp_path):
+    """Checks if broken cache files are ignored."""
+    path = tmp_path / "controlDict"
+    path.write_text("a 1;")
+    cache = DiskCache(str(tmp_path / "cache"))
+    cache.parse_file(str(path))
+
+    for entry in (tmp_path / "cache").iterdir():
+        entry.write_bytes(b"garbage")
+    assert cache.parse_file(str(path)) == {"a": "1"}
+    assert cache.misses == 2
+
+
+def test_cache_workers(tmp_path, monkeypatch):
+    """Checks if files missing from the caches are parsed with the workers."""
+    from foamparser import cache
+
+    calls = []
+
+    def recorded(path, **kwargs):
+        calls.append(kwargs["workers"])
+        return parse_file(path, **kwargs)
+
+    monkeypatch.setattr(cache, "_parse_file", recorded)
+    path = tmp_path / "U"
+    write(path, FIELD, 1_000_000_000)
+    result = parse_file(str(path), cache_dir=str(tmp_path / "cache"), workers=2)
+    assert result["internalField"][3] == parse_file(str(path))["internalField"][3]
+    FileCache().parse_file(str(path), workers=3)
+    assert calls == [2, 3]
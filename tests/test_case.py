@@ -0,0 +1,198 @@
+import sys
+import os
+import struct
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import case
+
+HEADER = "FoamFile {{ format ascii; class {cls}; object {obj}; }}\n"
+
+
+def write(path, cls, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER.format(cls=cls, obj=path.name) + body)
+
+
+def write_processor(root, number, cells, fields, faces=None, boundary=None):
+    processor = root / f"processor{number}"
+    polymesh = processor / "constant" / "polyMesh"
+    write(
+        polymesh / "cellProcAddressing",
+        "labelList",
+        f"{len(cells)}({' '.join(map(str, cells))})",
+    )
+    if faces is not None:
+        write(
+            polymesh / "faceProcAddressing",
+            "labelList",
+            f"{len(faces)}({' '.join(map(str, faces))})",
+        )
+        write(polymesh / "boundary", "polyBoundaryMesh", boundary)
+    for name, (cls, body) in fields.items():
+        write(processor / "0.5" / name, cls, body)
+
+
+def test_processor_dirs(tmp_path):
+    """Checks if the processor directories are ordered by number."""
+    for name in ("processor10", "processor2", "processors", "constant"):
+        (tmp_path / name).mkdir()
+    assert case.processor_dirs(str(tmp_path)) == [
+        str(tmp_path / "processor2"),
+        str(tmp_path / "processor10"),
+    ]
+
+
+def test_reconstruct_cell_field(tmp_path):
+    """Checks if the cell values of each processor land in their place."""
+    write_processor(
+        tmp_path,
+        0,
+        [2, 0],
+        {
+            "p": ("volScalarField", "internalField nonuniform List<scalar> 2(20 0);"),
+            "U": (
+                "volVectorField",
+                "internalField nonuniform List<vector> 2((2 0 0) (0 0 0));",
+            ),
+        },
+    )
+    write_processor(
+        tmp_path,
+        1,
+        [3, 1],
+        {
+            "p": ("volScalarField", "internalField uniform 5;"),
+            "U": ("volVectorField", "internalField uniform (1 2 3);"),
+        },
+    )
+    p = case.reconstruct_field(str(tmp_path), "0.5", "p", workers=2)
+    assert p.tolist() == [0, 5, 20, 5]
+    U = case.reconstruct_field(str(tmp_path), "0.5", "U", workers=2)
+    assert U.tolist() == [[0, 0, 0], [1, 2, 3], [2, 0, 0], [1, 2, 3]]
+
+
+def test_reconstruct_face_field(tmp_path):
+    """Checks if fluxes come from internal faces and processor patches."""
+    write_processor(
+        tmp_path,
+        0,
+        [0],
+        {
+            "phi": (
+                "surfaceScalarField",
+                "internalField nonuniform List<scalar> 1(1.5);\n"
+                "boundaryField {\n"
+                "    procBoundary0to1 { type processor; value uniform -2; }\n"
+                "    wall { type calculated; value uniform 9; }\n"
+                "}\n",
+            )
+        },
+        faces=[1, -2, 10],
+        boundary="2(procBoundary0to1 { type processor; nFaces 1; startFace 1; }\n"
+        "wall { type wall; nFaces 1; startFace 2; })",
+    )
+    write_processor(
+        tmp_path,
+        1,
+        [1],
+        {
+            "phi": (
+                "surfaceScalarField",
+                "internalField nonuniform List<scalar> 1(3);\n"
+                "boundaryField {\n"
+                "    procBoundary1to0\n"
+                "    { type processor; value nonuniform List<scalar> 1(2); }\n"
+                "}\n",
+            )
+        },
+        faces=[3, 2],
+        boundary="1(procBoundary1to0 { type processor; nFaces 1; startFace 1; })",
+    )
+    phi = case.reconstruct_field(str(tmp_path), "0.5", "phi")
+    assert phi.tolist() == [1.5, 2, 3]
+
+
+def test_case(tmp_path, monkeypatch):
+    """Checks if times and fields are indexed without parsing the fields."""
+    for time in ("0", "0.5", "1e-1", "10"):
+        write(tmp_path / time / "p", "volScalarField", "internalField uniform 1;")
+    write(tmp_path / "0.5" / "U", "volVectorField", "internalField uniform (1 0 0);")
+    (tmp_path / "0.orig").mkdir()
+    (tmp_path / "0.5" / "uniform").mkdir()
+    (tmp_path / "0.5" / "notes").write_text("not a field")
+    (tmp_path / "0.5" / "data").write_bytes(b"\x00\x01")
+    (tmp_path / "0.5" / "log").write_bytes(b'FoamFile { note "\xff"; }')
+
+    def parse_file(*args, **kwargs):
+        raise AssertionError("the fields shouldn't be parsed")
+
+    monkeypatch.setattr("foamparser.case.parse_file", parse_file)
+    actual = case.Case(str(tmp_path))
+    assert actual.times == ["0", "1e-1", "0.5", "10"]
+    assert sorted(actual["0.5"]) == ["U", "p"]
+    assert actual["0.5"].headers["U"]["class"] == "volVectorField"
+    assert actual.field_times("U") == ["0.5"]
+    assert "U" not in actual["10"]
+
+    monkeypatch.undo()
+    assert actual["0.5"]["U"]["internalField"] == ["uniform", ["1", "0", "0"]]
+
+
+def test_stack(tmp_path):
+    """Checks if a field at every time is stacked into a .npy file."""
+    write(tmp_path / "0" / "U", "volVectorField", "internalField uniform (0 0 1);")
+    for i, time in enumerate(("1", "2")):
+        write(
+            tmp_path / time / "U",
+            "volVectorField",
+            f"internalField nonuniform List<vector> 2(({i} 0 0) (0 {i} 0));",
+        )
+    output = tmp_path / "U.npy"
+    actual = case.Case(str(tmp_path)).stack("U", str(output), workers=2)
+    expected = [
+        [[0, 0, 1], [0, 0, 1]],
+        [[0, 0, 0], [0, 0, 0]],
+        [[1, 0, 0], [0, 1, 0]],
+    ]
+    assert actual.tolist() == expected
+
+    # the file is a regular .npy file
+    data = output.read_bytes()
+    assert data.startswith(b"\x93NUMPY")
+    assert struct.unpack("<d", data[-8:]) == (0,)
+    assert len(data) % 8 == 0
+
+
+def test_stack_window(tmp_path, monkeypatch):
+    """Checks if, with workers, times are parsed as the rows are written."""
+    monkeypatch.setattr("foamparser.parallel.PARSE_WINDOW", 1)
+    times = [str(i) for i in range(8)]
+    for i, time in enumerate(times):
+        write(
+            tmp_path / time / "p",
+            "volScalarField",
+            f"internalField nonuniform List<scalar> 2({i} {-i});",
+        )
+    taken = []
+    written = []
+
+    def parse_many(files, *args, **kwargs):
+        def counted():
+            for file in files:
+                taken.append(file)
+                yield file
+
+        return case_parse_many(counted(), *args, **kwargs)
+
+    def write_row(self, row, values):
+        written.append(len(taken))
+        writer_write(self, row, values)
+
+    case_parse_many = case.parse_many
+    writer_write = case._StackWriter.write
+    monkeypatch.setattr(case, "parse_many", parse_many)
+    monkeypatch.setattr(case._StackWriter, "write", write_row)
+    actual = case.Case(str(tmp_path)).stack("p", str(tmp_path / "p.npy"), workers=2)
+    assert actual.tolist() == [[i, -i] for i in range(8)]
+    assert written[0] <= 4
@@ -0,0 +1,139 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import parse
+from foamparser.cst import parse_cst
+from foamparser.cst import parse_cst_file
+
+INPUT = """/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    object      controlDict;
+}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+application     simpleFoam;    // the solver
+#include "common"
+
+endTime         100;
+
+functions
+{
+    probes
+    {
+        type            probes;
+        fields          ( p U );
+    }
+    empty {}
+}
+
+// ************************************************************************* //
+"""
+
+
+def test_round_trip():
+    """Checks if an unchanged document gives back its content, comments
+    included."""
+    document = parse_cst(INPUT)
+    assert document.dumps() == INPUT
+    assert len(document.comments) == 4
+    start, end = document.comments[2]
+    assert INPUT[start:end] == "// the solver"
+    span = document.spans[("functions", "probes", "type")]
+    assert INPUT[span.start : span.end] == "type            probes;"
+    assert INPUT[span.value : span.end] == "probes;"
+
+    assert document["endTime"] == "100"
+    assert document["functions/probes/fields"] == ["p", "U"]
+    assert document["functions"]["probes"]["type"] == "probes"
+
+
+def test_set():
+    """Checks if only the spans of the changed entries are replaced."""
+    document = parse_cst(INPUT)
+    document["endTime"] = 2000
+    document.set(("functions", "probes", "fields"), ["p", "U", "k"])
+    output = document.dumps()
+    assert output == INPUT.replace(
+        "endTime         100;", "endTime         2000;"
+    ).replace("( p U )", "(p U k)")
+    assert document["endTime"] == 2000
+    assert document["functions"]["probes"]["fields"] == ["p", "U", "k"]
+
+    # setting again replaces the value
+    document["endTime"] = "3000"
+    assert "endTime         3000;" in document.dumps()
+
+
+def test_add():
+    """Checks if new entries go after the last entry of their dictionary,
+    keeping its indentation."""
+    document = parse_cst(INPUT)
+    document["application"] = "pimpleFoam"
+    document["writeInterval"] = 10
+    document["functions/probes/probeLocations"] = [[0, 0, 0], [1, 0, 0]]
+    document["functions/empty/type"] = ("surfaces", "uniform")
+    document["functions/forces/type"] = "forces"
+    document["functions/forces/patches"] = ["wall"]
+    output = document.dumps()
+
+    assert "application     pimpleFoam;    // the solver\n" in output
+    assert (
+        "        fields          ( p U );\n"
+        "        probeLocations ((0 0 0) (1 0 0));\n"
+        "    }\n"
+    ) in output
+    assert "    empty {\n        type surfaces uniform;\n    }\n" in output
+    assert (
+        "    forces\n    {\n        type forces;\n        patches (wall);\n    }\n}"
+    ) in output
+    # after the last entry, before the closing comment
+    assert output.endswith(
+        "    }\n}\nwriteInterval 10;\n\n// " + "*" * 73 + " //\n"
+    )
+
+    result = parse(output)
+    assert result["writeInterval"] == "10"
+    assert result["functions"]["forces"] == {"type": "forces", "patches": ["wall"]}
+    assert result["functions"]["probes"]["probeLocations"] == [
+        ["0", "0", "0"],
+        ["1", "0", "0"],
+    ]
+
+
+def test_add_quoted_names():
+    """Checks if new names are quoted when needed, so the output can be
+    parsed again."""
+    document = parse_cst(INPUT)
+    document["physics:time"] = "q"
+    document["functions/(U|k)Final/type"] = "residuals"
+    document["items"] = [{"a:b": "1"}]
+    output = document.dumps()
+    assert '"physics:time" q;' in output
+
+    result = parse(output)
+    assert result["physics:time"] == "q"
+    assert result["functions"]["(U|k)Final"] == {"type": "residuals"}
+    assert result["items"] == [{"a:b": "1"}]
+
+
+def test_file(tmp_path):
+    """Checks documents over the bytes of a file."""
+    path = tmp_path / "controlDict"
+    path.write_bytes(INPUT.encode())
+    document = parse_cst_file(str(path))
+    document["functions/probes"] = {"type": "probes", "fields": "(T)"}
+    document.write(str(path))
+
+    output = path.read_bytes()
+    assert output.startswith(INPUT[:200].encode())
+    assert (
+        b"    probes\n    {\n        type probes;\n        fields (T);\n    }\n"
+    ) in output
+    assert parse_cst_file(str(path))["functions/probes/fields"] == ["T"]
@@ -0,0 +1,100 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import exceptions
+from foamparser.includes import IncludeResolver
+
+
+def test_include(tmp_path):
+    """Checks if included entries land where the include is."""
+    (tmp_path / "system").mkdir()
+    (tmp_path / "system" / "controlDict").write_text(
+        'a 1;\nb 1;\n#include "../common"\nb 3;\n'
+        "sub { #include \"../common\"; }\n"
+        '#includeIfPresent "missing"\n'
+    )
+    (tmp_path / "common").write_text(
+        "FoamFile { object common; }\na 2;\nb 2;\nc { d 4; }\n"
+    )
+    resolver = IncludeResolver(etc=[])
+    actual = resolver.parse_file(str(tmp_path / "system" / "controlDict"))
+    assert actual == {
+        "a": "2",
+        "b": "3",
+        "c": {"d": "4"},
+        "sub": {"a": "2", "b": "2", "c": {"d": "4"}},
+    }
+    assert list(actual) == ["a", "b", "c", "sub"]
+    # each file is parsed once
+    assert resolver.parsed == 2
+
+    actual["c"]["d"] = "5"
+    again = resolver.parse_file(str(tmp_path / "system" / "controlDict"))
+    assert again["c"]["d"] == "4"
+
+
+def test_include_shared(tmp_path):
+    """Checks if a file included by many files is parsed once."""
+    (tmp_path / "shared").write_text("value 1;")
+    resolver = IncludeResolver(etc=[])
+    for i in range(10):
+        path = tmp_path / f"file{i}"
+        path.write_text(f'#include "shared"\nindex {i};')
+        assert resolver.parse_file(str(path)) == {"value": "1", "index": str(i)}
+    assert resolver.parsed == 11
+
+
+def test_include_etc_and_func(tmp_path):
+    """Checks if includes are searched in the etc directories."""
+    etc = tmp_path / "etc"
+    templates = etc / "caseDicts" / "postProcessing" / "surfaceFieldValue"
+    templates.mkdir(parents=True)
+    (etc / "caseDicts" / "setConstraintTypes").write_text("cyclic { type cyclic; }")
+    (templates / "patchAverage").write_text("type surfaceFieldValue; operation avg;")
+    (tmp_path / "controlDict").write_text(
+        "boundaryField { #includeEtc \"caseDicts/setConstraintTypes\" }\n"
+        "functions\n{\n"
+        "    #includeFunc patchAverage(name=inlet, fields=(p U))\n"
+        "    #includeFunc patchAverage(U)\n"
+        "}\n"
+    )
+    actual = IncludeResolver(etc=[str(etc)]).parse_file(str(tmp_path / "controlDict"))
+    assert actual["boundaryField"] == {"cyclic": {"type": "cyclic"}}
+    assert actual["functions"] == {
+        "patchAverage(name=inlet, fields=(p U))": {
+            "type": "surfaceFieldValue",
+            "operation": "avg",
+            "name": "inlet",
+            "fields": ["p", "U"],
+        },
+        "patchAverage(U)": {
+            "type": "surfaceFieldValue",
+            "operation": "avg",
+            "field": "U",
+        },
+    }
+
+
+def test_include_cycle(tmp_path):
+    """Checks if includes going in circles are an error."""
+    (tmp_path / "a").write_text('#include "b"')
+    (tmp_path / "b").write_text('#include "a"')
+    try:
+        IncludeResolver(etc=[]).parse_file(str(tmp_path / "a"))
+    except exceptions.IncludeCycleError as exc:
+        assert [os.path.basename(path) for path in exc.chain] == ["a", "b", "a"]
+        return
+    raise Exception
+
+
+def test_include_missing(tmp_path):
+    """Checks if a missing include is an error."""
+    (tmp_path / "c").write_text('#include "missing"')
+    try:
+        IncludeResolver(etc=[]).parse_file(str(tmp_path / "c"))
+    except exceptions.IncludeNotFoundError as exc:
+        assert exc.filename == "missing"
+        return
+    raise Exception
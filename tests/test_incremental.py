@@ -0,0 +1,143 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import exceptions
+from foamparser import parse
+from foamparser.incremental import IncrementalParser
+
+CONTENT = """/*--------------------------------*- C++ -*-------------------------------*\\
+| banner                                                                    |
+\\*-------------------------------------------------------------------------*/
+FoamFile
+{
+    format ascii;
+    class volScalarField;
+}
+// a line comment
+internalField nonuniform List<scalar> 5 (1 2.5 3 4 5e-1);
+boundaryField
+{
+    inlet
+    {
+        type "fixed value";  /* a block
+        comment */
+        value nonuniform List<vector> 2 ((1 2 3) (4 5 6));
+        words ( a (b c) { d e; } );
+    }
+    #include "other";
+}
+"""
+
+
+def feed_in_chunks(content, size, **kwargs):
+    parser = IncrementalParser(**kwargs)
+    for pos in range(0, len(content), size):
+        parser.feed(content[pos : pos + size])
+    return parser.close()
+
+
+def normalise(value):
+    """Turn arrays into lists, so results can be compared."""
+    if isinstance(value, dict):
+        return {key: normalise(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalise(item) for item in value]
+    if isinstance(value, str):
+        return value
+    return value.tolist()
+
+
+def test_same_as_parse():
+    """Checks if feeding the content in any chunk size gives the same result as parse()."""
+    expected = normalise(parse(CONTENT, tensors=True))
+    for size in (1, 2, 3, 7, 64, len(CONTENT)):
+        actual = normalise(feed_in_chunks(CONTENT, size, tensors=True))
+        assert actual == expected, size
+
+
+def test_bytes():
+    """Checks if the chunks can be bytes."""
+    expected = normalise(parse(CONTENT))
+    actual = normalise(feed_in_chunks(CONTENT.encode(), 5))
+    assert actual == expected
+
+
+def test_buffer_is_bounded():
+    """Checks if only the incomplete token is kept between chunks."""
+    parser = IncrementalParser()
+    parser.feed("a 1; b 2; longIdent")
+    assert parser._buffer == " longIdent"
+    parser.feed("ifier 3;")
+    assert parser._buffer == ""
+    assert parser.close() == {"a": "1", "b": "2", "longIdentifier": "3"}
+
+
+def test_include_without_end():
+    """Checks if the ";" after an include is optional."""
+    content = (
+        '#include "a"\nb 1;\n#includeEtc "c";\n'
+        "#includeFunc patchAverage(name=inlet, fields=(p U))\nd 2;\n"
+        "#includeFunc residuals;"
+    )
+    expected = parse(content)
+    assert expected["#includes"][2:] == [
+        "patchAverage(name=inlet, fields=(p U))",
+        "residuals",
+    ]
+    for size in (1, 3, len(content)):
+        assert feed_in_chunks(content, size) == expected, size
+
+
+def test_bulk_body_is_bounded(monkeypatch):
+    """Checks if the body of a big list is converted as it arrives, instead
+    of being kept until the list closes."""
+    monkeypatch.setattr("foamparser.numeric.STREAM_BUFFER_SIZE", 64)
+    vectors = " ".join(f"({i} {i}.5 -{i})" for i in range(500))
+    content = f"a 1; U List<vector> 500 ({vectors}); b List<label> 3 (1 2 3);"
+    expected = normalise(parse(content, tensors=True))
+
+    parser = IncrementalParser(tensors=True)
+    largest = 0
+    for pos in range(0, len(content), 50):
+        parser.feed(content[pos : pos + 50])
+        if parser._bulk is not None:
+            largest = max(largest, parser._bulk.pending_size)
+    assert normalise(parser.close()) == expected
+    assert largest <= 64 + 50
+
+
+def test_bulk_fallback(monkeypatch):
+    """Checks if a list that isn't numeric goes through the generic path while
+    its body was kept, and is an error after that."""
+    content = "a List<scalar> 3 (1 two 3); b 2;"
+    assert feed_in_chunks(content, 4) == parse(content)
+
+    monkeypatch.setattr("foamparser.numeric.STREAM_BUFFER_SIZE", 16)
+    content = "a List<scalar> 12 (1 2 3 4 5 6 7 8 9 10 eleven 12); b 2;"
+    try:
+        feed_in_chunks(content, 4)
+    except exceptions.InvalidListError as error:
+        assert error.position == content.index("(") + 1
+    else:
+        raise Exception("A big list that isn't numeric should be an error")
+
+
+def test_bulk_mixed_widths(monkeypatch):
+    """Checks if tuples of other widths are left to the generic path, even
+    when the number of values adds up."""
+    content = "a List<vector> 2 ((1 2 3 4) (5 6)); b List<vector> 1 ((1 2 3));"
+    expected = normalise(parse(content, tensors=True))
+    assert expected["a"][2] == [["1", "2", "3", "4"], ["5", "6"]]
+    for size in (3, len(content)):
+        assert normalise(feed_in_chunks(content, size, tensors=True)) == expected
+
+    monkeypatch.setattr("foamparser.numeric.STREAM_BUFFER_SIZE", 8)
+    content = "a List<vector> 3 ((1 2 3) (4 5 6 7) (8 9)); b 2;"
+    try:
+        feed_in_chunks(content, 4, tensors=True)
+    except exceptions.InvalidListError:
+        pass
+    else:
+        raise Exception("A big list with tuples of other widths should be an error")
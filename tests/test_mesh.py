@@ -0,0 +1,122 @@
+import sys
+import os
+import gzip
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import mesh
+
+HEADER = """/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{{
+    version     2.0;
+    format      ascii;
+    class       {cls};
+    note        "nPoints:8 nCells:1 nFaces:6 nInternalFaces:0";
+    location    "constant/polyMesh";
+    object      {obj};
+}}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+"""
+
+FILES = {
+    "points": (
+        "vectorField",
+        """8
+(
+(0 0 0)
+(1 0 0)
+(1 1 0)
+(0 1 0)
+(0 0 1)
+(1 0 1)
+(1 1 1)
+(0 1 1)
+)
+""",
+    ),
+    "faces": (
+        "faceList",
+        """6
+(
+4(0 3 2 1)
+4(4 5 6 7)
+4(0 4 7 3)
+4(1 2 6 5)
+4(0 1 5 4)
+4(3 7 6 2)
+)
+""",
+    ),
+    "owner": ("labelList", "6(0 0 0 0 0 0)\n"),
+    "neighbour": ("labelList", "0()\n"),
+    "boundary": (
+        "polyBoundaryMesh",
+        """2
+(
+    walls
+    {
+        type            wall;
+        nFaces          4;
+        startFace       0;
+    }
+    frontAndBack
+    {
+        type            empty;
+        nFaces          2;
+        startFace       4;
+    }
+)
+""",
+    ),
+}
+
+
+def write_mesh(path, files=FILES):
+    for name, (cls, body) in files.items():
+        with open(os.path.join(path, name), "w") as outfile:
+            outfile.write(HEADER.format(cls=cls, obj=name) + body)
+
+
+def test_read_mesh(tmp_path):
+    """Checks if all the mesh files are read into arrays."""
+    write_mesh(tmp_path)
+    actual = mesh.read_mesh(str(tmp_path))
+
+    assert actual["points"].tolist()[6] == [1.0, 1.0, 1.0]
+    offsets, labels = actual["faces"]
+    assert offsets.tolist() == [0, 4, 8, 12, 16, 20, 24]
+    assert labels.tolist()[4:8] == [4, 5, 6, 7]
+    assert actual["owner"].tolist() == [0] * 6
+    assert len(actual["neighbour"]) == 0
+    assert actual["boundary"]["frontAndBack"] == {
+        "type": "empty",
+        "nFaces": "2",
+        "startFace": "4",
+    }
+
+
+def test_compact_faces(tmp_path):
+    """Checks if a faceCompactList gives the same offsets and labels."""
+    write_mesh(
+        tmp_path,
+        {"faces": ("faceCompactList", "3(0 4 7)\n7(0 1 2 3 4 5 6)\n")},
+    )
+    offsets, labels = mesh.read_faces(str(tmp_path / "faces"))
+    assert offsets.tolist() == [0, 4, 7]
+    assert labels.tolist() == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_compressed_mesh(tmp_path):
+    """Checks if compressed mesh files are found and read."""
+    write_mesh(tmp_path)
+    points = tmp_path / "points"
+    with gzip.open(str(points) + ".gz", "wb") as outfile:
+        outfile.write(points.read_bytes())
+    points.unlink()
+    actual = mesh.read_mesh(str(tmp_path))
+    assert actual["points"].tolist()[6] == [1.0, 1.0, 1.0]
@@ -0,0 +1,80 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import exceptions
+from foamparser.parallel import parse_many
+
+
+def write_files(path):
+    paths = []
+    for i in range(5):
+        filename = path / f"p{i}"
+        filename.write_text(f"a {i}; b nonuniform List<scalar> 2({i} {i + 1});")
+        paths.append(str(filename))
+    broken = path / "broken"
+    broken.write_text("a 1; )")
+    paths.insert(2, str(broken))
+    return paths
+
+
+def test_parse_many(tmp_path):
+    """Checks if results come in order, with arrays and errors."""
+    paths = write_files(tmp_path)
+    results = list(parse_many(paths, workers=2, chunksize=2))
+    assert [parsed.path for parsed in results] == paths
+    assert results[0].result["a"] == "0"
+    assert results[0].result["b"][3].tolist() == [0, 1]
+    assert results[3].result["b"][3].tolist() == [2, 3]
+    assert results[2].result is None
+    assert isinstance(results[2].error, exceptions.UnexpectedTokenError)
+
+
+def test_parse_many_unordered(tmp_path):
+    """Checks if all the results come when they're not ordered."""
+    paths = write_files(tmp_path)
+    results = list(parse_many(paths, workers=2, ordered=False))
+    assert sorted(parsed.path for parsed in results) == sorted(paths)
+    assert sum(parsed.error is not None for parsed in results) == 1
+
+
+def test_parse_chunk_store_failure(tmp_path, monkeypatch):
+    """Checks if results that can't be stored are given as they are."""
+    from foamparser import parallel
+
+    def store_result(entry, result):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(parallel, "store_result", store_result)
+    paths = write_files(tmp_path)
+    directory = tmp_path / "stored"
+    directory.mkdir()
+    parsed = parallel._parse_chunk(paths, parallel.parse_file, str(directory))
+    assert [path for path, _, _, _ in parsed] == paths
+    assert all(stored is None for _, _, stored, _ in parsed)
+    path, result, stored, error = parsed[3]
+    assert error is None
+    assert result["b"][3].tolist() == [2, 3]
+    assert isinstance(parsed[2][3], exceptions.UnexpectedTokenError)
+    assert list(directory.iterdir()) == []
+
+
+def test_parse_many_window(tmp_path, monkeypatch):
+    """Checks if files are only taken as the results are consumed."""
+    monkeypatch.setattr("foamparser.parallel.PARSE_WINDOW", 1)
+    paths = write_files(tmp_path) * 4
+    taken = []
+
+    def files():
+        for path in paths:
+            taken.append(path)
+            yield path
+
+    for ordered in (True, False):
+        taken.clear()
+        results = parse_many(files(), workers=2, ordered=ordered)
+        next(results)
+        assert len(taken) <= 4
+        assert len(list(results)) == len(paths) - 1
+        assert len(taken) == len(paths)
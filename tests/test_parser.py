@@ -1,10 +1,16 @@
 import sys
 import os
+import gzip
 import logging
+import struct
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from foamparser import iterparse
+from foamparser import iterparse_file
 from foamparser import parse
+from foamparser import parse_file
+from foamparser import read_header
 from foamparser import exceptions
 
 logging.basicConfig(level=logging.DEBUG)
@@ -453,3 +459,543 @@ FoamFile
     }
     actual = parse(input)
     assert actual == expected
+
+
+def test_multiple_block_comments():
+    """Tests if a block comment ends at the first closing marker."""
+    input = """/* first */
+a 1;
+/* second */
+b 2;"""
+    expected = {"a": "1", "b": "2"}
+    actual = parse(input)
+    assert actual == expected
+
+
+def test_scalar_field():
+    """Tests if a sized scalar list is read in bulk into an array."""
+    input = """internalField nonuniform List<scalar> 4
+(
+0.5
+1e-3
+-2
+3
+);
+other 1;"""
+    actual = parse(input)
+    kind, list_type, size, values = actual["internalField"]
+    assert (kind, list_type, size) == ("nonuniform", "List<scalar>", "4")
+    assert values.tolist() == [0.5, 1e-3, -2.0, 3.0]
+    assert actual["other"] == "1"
+
+
+def test_label_field():
+    """Tests if a sized label list is read in bulk into an integer array."""
+    input = "cells List<label> 3(4 5 6);"
+    actual = parse(input)
+    assert actual["cells"][2].tolist() == [4, 5, 6]
+
+
+def test_label_field_overflow():
+    """Tests if labels that don't fit in 64 bits go through the normal path,
+    instead of being saturated or failing."""
+    input = "cells List<label> 2(1 99999999999999999999);"
+    expected = {"cells": ["List<label>", "2", ["1", "99999999999999999999"]]}
+    assert parse(input) == expected
+
+    input = "cells List<label> 2(1 -99999999999999999999);"
+    expected = {"cells": ["List<label>", "2", ["1", "-99999999999999999999"]]}
+    assert parse(input) == expected
+
+
+def test_scalar_field_fallback():
+    """Tests if a list that can't be read in bulk goes through the normal path."""
+    input = "internalField nonuniform List<scalar> 2 (1 two);"
+    expected = {"internalField": ["nonuniform", "List<scalar>", "2", ["1", "two"]]}
+    actual = parse(input)
+    assert actual == expected
+
+
+def test_vector_field():
+    """Tests if a sized vector list becomes an (N, 3) array when asked to."""
+    input = """internalField nonuniform List<vector> 2
+(
+(1 2 3)
+(4 5 6e-1)
+);"""
+    actual = parse(input, tensors=True)
+    assert actual["internalField"][3].tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 0.6]]
+
+
+def test_vector_field_mixed_widths(monkeypatch):
+    """Tests if tuples of other widths are left to the generic path, even
+    when the number of values adds up."""
+    for body in ("(1 2 3 4 5 6) ()", "(1 2 3 4) (5 6)", "(1 2) (3 4 5 6)"):
+        input = f"value nonuniform List<vector> 2({body});"
+        expected = parse(input)
+        assert parse(input, tensors=True) == expected
+        monkeypatch.setattr("foamparser.numeric.PARALLEL_SIZE", 4)
+        assert parse(input, tensors=True, workers=2) == expected
+        monkeypatch.undo()
+
+
+def test_vector_field_default():
+    """Tests if vector lists stay as nested lists unless asked otherwise."""
+    input = "value nonuniform List<vector> 1((1 2 3));"
+    expected = {"value": ["nonuniform", "List<vector>", "1", [["1", "2", "3"]]]}
+    actual = parse(input)
+    assert actual == expected
+
+
+def test_empty_tensor_field():
+    """Tests if an empty tensor list is read in bulk."""
+    input = "value nonuniform List<tensor> 0();"
+    actual = parse(input, tensors=True)
+    assert len(actual["value"][3]) == 0
+
+
+BINARY_FIELD = b"""FoamFile
+{
+    version     2.0;
+    format      binary;
+    arch        "LSB;label=32;scalar=64";
+    class       volVectorField;
+    object      U;
+}
+internalField nonuniform List<vector> 2(%s);
+boundaryField
+{
+    inlet
+    {
+        type fixedValue;
+        value uniform (1 0 0);
+    }
+    outlet
+    {
+        type calculated;
+        value nonuniform List<scalar> 1(%s);
+    }
+}
+"""
+
+
+def test_parse_file(tmp_path):
+    """Tests if parsing a file gives the same result as parsing its content."""
+    path = tmp_path / "controlDict"
+    path.write_text('application simpleFoam;\nfunctions { a { b "c d"; } }\n')
+    expected = {"application": "simpleFoam", "functions": {"a": {"b": "c d"}}}
+    actual = parse_file(str(path))
+    assert actual == expected
+
+
+def test_parse_binary_file(tmp_path):
+    """Tests if the binary lists are mapped with the sizes in the header."""
+    path = tmp_path / "U"
+    path.write_bytes(
+        BINARY_FIELD
+        % (struct.pack("<6d", 1, 2, 3, 4, 5, 41.5), struct.pack("<d", 0.25))
+    )
+    actual = parse_file(str(path))
+    assert actual["FoamFile"]["format"] == "binary"
+    assert actual["internalField"][3].tolist() == [[1, 2, 3], [4, 5, 41.5]]
+    assert actual["boundaryField"]["inlet"]["value"] == ["uniform", ["1", "0", "0"]]
+    assert actual["boundaryField"]["outlet"]["value"][3].tolist() == [0.25]
+
+
+def test_parse_file_in_chunks(tmp_path, monkeypatch):
+    """Tests if big lists give the same arrays when converted in chunks."""
+    monkeypatch.setattr("foamparser.numeric.CHUNK_SIZE", 16)
+    path = tmp_path / "U"
+    values = " ".join(f"({i} {i}.5 -{i})" for i in range(20))
+    path.write_text(
+        f"a List<scalar> 30({' '.join(map(str, range(30)))});\n"
+        f"b List<vector> 20({values});\n"
+    )
+    actual = parse_file(str(path), tensors=True)
+    assert actual["a"][2].tolist() == list(range(30))
+    assert actual["b"][2].tolist() == [[i, i + 0.5, -i] for i in range(20)]
+
+
+def test_parse_gzip_file(tmp_path, monkeypatch):
+    """Tests if compressed files are decompressed in blocks while parsing."""
+    monkeypatch.setattr("foamparser.parser.GZIP_BLOCK_SIZE", 5)
+    content = (
+        "FoamFile { format ascii; object p; }\n"
+        "internalField nonuniform List<scalar> 4(1 2 3 4);\n"
+        'boundaryField { inlet { type "fixedValue"; } }\n'
+    )
+    path = tmp_path / "p.gz"
+    path.write_bytes(gzip.compress(content.encode()))
+    actual = parse_file(str(path))
+    assert actual["internalField"][3].tolist() == [1, 2, 3, 4]
+    assert actual["boundaryField"] == {"inlet": {"type": "fixedValue"}}
+    assert read_header(str(path)) == {"format": "ascii", "object": "p"}
+    assert parse_file(str(path), select=["boundaryField"]) == {
+        "boundaryField": {"inlet": {"type": "fixedValue"}}
+    }
+
+
+def test_parse_gzip_include_func(tmp_path, monkeypatch):
+    """Tests if the arguments of an #includeFunc are kept in compressed files."""
+    monkeypatch.setattr("foamparser.parser.GZIP_BLOCK_SIZE", 64)
+    content = (
+        "FoamFile { format ascii; object controlDict; }\n"
+        "functions\n{\n"
+        "    #includeFunc patchAverage(name=inlet, fields=(p U))\n"
+        "    #includeFunc residuals;\n"
+        "}\n"
+        "endTime 10;\n"
+    )
+    plain = tmp_path / "controlDict"
+    plain.write_text(content)
+    path = tmp_path / "controlDict.gz"
+    path.write_bytes(gzip.compress(content.encode()))
+    actual = parse_file(str(path))
+    assert actual == parse_file(str(plain))
+    assert actual["functions"]["#includes"] == [
+        "patchAverage(name=inlet, fields=(p U))",
+        "residuals",
+    ]
+
+
+def test_parse_gzip_memory(tmp_path, monkeypatch):
+    """Tests if a compressed field is parsed without holding its content."""
+    import tracemalloc
+
+    monkeypatch.setattr("foamparser.parser.GZIP_BLOCK_SIZE", 1 << 14)
+    values = "\n".join(f"{i}.123456789e-3" for i in range(100000))
+    content = f"internalField nonuniform List<scalar> 100000\n(\n{values}\n);\n"
+    path = tmp_path / "p.gz"
+    path.write_bytes(gzip.compress(content.encode()))
+    del values
+
+    tracemalloc.start()
+    try:
+        actual = parse_file(str(path))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(actual["internalField"][3]) == 100000
+    # the array (800 kB) and a few blocks, not the content (1.9 MB)
+    assert peak < 800000 + len(content) // 2
+
+
+def test_parse_gzip_same_as_plain(tmp_path, monkeypatch):
+    """Tests if compressed files give the same result as uncompressed ones,
+    for big lists that aren't numeric and with workers."""
+    monkeypatch.setattr("foamparser.parser.GZIP_BLOCK_SIZE", 1 << 10)
+    monkeypatch.setattr("foamparser.numeric.STREAM_BUFFER_SIZE", 1 << 10)
+    monkeypatch.setattr("foamparser.numeric.PARALLEL_SIZE", 1 << 10)
+    values = " ".join(map(str, range(4000)))
+    content = (
+        "FoamFile { format ascii; object p; }\n"
+        f"a List<scalar> 4001 ({values} word);\n"
+        f"b List<scalar> 4000 ({values});\n"
+    )
+    plain = tmp_path / "p"
+    plain.write_text(content)
+    path = tmp_path / "p.gz"
+    path.write_bytes(gzip.compress(content.encode()))
+
+    expected = parse_file(str(plain))
+    actual = parse_file(str(path))
+    assert actual["a"] == expected["a"]
+    assert actual["a"][2][-1] == "word"
+    assert actual["b"][2].tolist() == list(range(4000))
+    actual = parse_file(str(path), workers=2)
+    assert actual["a"] == expected["a"]
+    assert actual["b"][2].tolist() == list(range(4000))
+
+
+def test_parse_gzip_binary_file(tmp_path):
+    """Tests if compressed binary files are read with the binary readers."""
+    path = tmp_path / "U.gz"
+    path.write_bytes(
+        gzip.compress(
+            BINARY_FIELD
+            % (struct.pack("<6d", 1, 2, 3, 4, 5, 41.5), struct.pack("<d", 0.25))
+        )
+    )
+    actual = parse_file(str(path))
+    assert actual["internalField"][3].tolist() == [[1, 2, 3], [4, 5, 41.5]]
+    assert actual["boundaryField"]["outlet"]["value"][3].tolist() == [0.25]
+
+
+def test_parse_in_parallel(monkeypatch):
+    """Tests if big lists give the same arrays when converted in parallel."""
+    monkeypatch.setattr("foamparser.numeric.PARALLEL_SIZE", 16)
+    values = " ".join(f"({i} {i}.5 -{i})" for i in range(20))
+    input = (
+        f"a List<scalar> 30({' '.join(map(str, range(30)))});\n"
+        f"b List<vector> 20({values});\n"
+    )
+    actual = parse(input, tensors=True, workers=2)
+    assert actual["a"][2].tolist() == list(range(30))
+    assert actual["b"][2].tolist() == [[i, i + 0.5, -i] for i in range(20)]
+
+    input = f"a List<scalar> 31({' '.join(map(str, range(30)))});"
+    assert parse(input, workers=2)["a"][2] == list(map(str, range(30)))
+
+
+def test_parallel_chunks_are_taken_as_needed():
+    """Tests if only a few chunks per worker are taken ahead when converting
+    in parallel."""
+    from foamparser.numeric import PARALLEL_WINDOW
+    from foamparser.numeric import _parallel_chunks
+
+    taken = []
+
+    def chunks():
+        for i in range(20):
+            taken.append(i)
+            yield f"{i} {i}"
+
+    ahead = []
+    for values in _parallel_chunks(chunks(), "q", None, 2):
+        ahead.append(len(taken) - int(values[0]))
+    assert max(ahead) <= 2 * PARALLEL_WINDOW
+    assert len(ahead) == 20
+
+
+def test_include_without_end():
+    """Tests if the ";" after an include is optional."""
+    input = '#include "a"\nb 1;\n#includeEtc "c";\n#includeFunc f(x=1)\nd 2;'
+    expected = {"#includes": ['"a"', '"c"', "f(x=1)"], "b": "1", "d": "2"}
+    assert parse(input) == expected
+    assert dict(parse(input, lazy=True)) == expected
+    assert parse(input, select=["d"]) == {"d": "2"}
+
+
+def test_lazy():
+    """Tests if lazy parsing gives the same result, but only parses what is accessed."""
+    input = """FoamFile { class volVectorField; }
+internalField nonuniform List<vector> 2 ((1 2 3) (4 5 6));
+boundaryField
+{
+    inlet { type fixedValue; value nonuniform List<scalar> 2 (1 2); }
+    walls { type "noSlip"; words (a (b) { c d; }); }
+    #include "other";
+}
+"""
+    actual = parse(input, lazy=True)
+    assert actual["boundaryField"]["walls"]["type"] == "noSlip"
+    assert "internalField" not in actual._values
+    assert "inlet" not in actual["boundaryField"]._values
+
+    expected = parse(input)
+    assert actual["boundaryField"]["walls"] == expected["boundaryField"]["walls"]
+    assert actual["internalField"][3] == expected["internalField"][3]
+    assert actual["boundaryField"]["#includes"] == ['"other"']
+    assert list(actual) == list(expected)
+
+
+def test_lazy_binary_file(tmp_path):
+    """Tests if lazy parsing jumps over binary payloads."""
+    path = tmp_path / "U"
+    path.write_bytes(
+        BINARY_FIELD
+        % (struct.pack("<6d", 1, 2, 3, 4, 5, 41.5), struct.pack("<d", 0.25))
+    )
+    actual = parse_file(str(path), lazy=True)
+    assert actual["boundaryField"]["outlet"]["type"] == "calculated"
+    assert actual["internalField"][3].tolist() == [[1, 2, 3], [4, 5, 41.5]]
+
+
+def test_read_header(tmp_path, monkeypatch):
+    """Tests if only the header is read, even if it spans several blocks."""
+    monkeypatch.setattr("foamparser.parser.HEADER_BLOCK_SIZE", 7)
+    path = tmp_path / "U"
+    path.write_bytes(
+        b"/* banner */\n// * * *\nFoamFile\n{\n    class volVectorField;\n"
+        b'    object "U";\n}\n'
+        b"internalField nonuniform List<vector> 1(\x00\x01 not parsed"
+    )
+    expected = {"class": "volVectorField", "object": "U"}
+    actual = read_header(str(path))
+    assert actual == expected
+
+
+def test_read_header_without_header(tmp_path):
+    """Tests if a file without a header gives an empty header."""
+    path = tmp_path / "controlDict"
+    path.write_text("application simpleFoam;")
+    assert read_header(str(path)) == {}
+
+
+def test_select():
+    """Tests if only the selected key paths are parsed."""
+    input = """application simpleFoam;
+functions
+{
+    FP { type fieldProcess; operations ( { a b; } ); }
+    IM { type runTimeVisualisation; }
+}
+boundaryField
+{
+    inlet { type fixedValue; value nonuniform List<scalar> 2 (1 2); }
+    outlet { type zeroGradient; }
+    "(front|back)" { type empty; }
+}
+"""
+    expected = {
+        "functions": {"FP": {"type": "fieldProcess"}},
+        "boundaryField": {
+            "inlet": {"type": "fixedValue"},
+            "outlet": {"type": "zeroGradient"},
+            "(front|back)": {"type": "empty"},
+        },
+    }
+    actual = parse(input, select=["functions/FP/type", "boundaryField/*/type"])
+    assert actual == expected
+
+
+def test_skip_vector_field(monkeypatch):
+    """Tests if a vector field is skipped without matching its brackets, even
+    when it isn't read as an array."""
+    from foamparser.scanner import skip_block as original
+
+    cells = "\n".join(f"({i} 0 -{i}.5)" for i in range(1000))
+    input = f"""internalField nonuniform List<vector> 1000
+(
+{cells}
+);
+boundaryField
+{{
+    inlet {{ type fixedValue; value uniform (1 0 0); }}
+}}
+"""
+    skipped = []
+
+    def skip_block(text, pos):
+        skipped.append(pos)
+        return original(text, pos)
+
+    monkeypatch.setattr("foamparser.parser.skip_block", skip_block)
+    assert parse(input, lazy=True)["boundaryField"]["inlet"]["type"] == "fixedValue"
+    actual = parse(input, select=["boundaryField/inlet/type"])
+    assert actual == {"boundaryField": {"inlet": {"type": "fixedValue"}}}
+    events = iterparse(input)
+    for event, path, _value in events:
+        if event == "start_list" and path == ("internalField",):
+            events.send(True)
+    # only the "(1 0 0)" of the inlet (which has no size), in lazy and select
+    assert len(skipped) == 2
+
+
+def test_select_subtree():
+    """Tests if selecting a dictionary brings all of it."""
+    input = "a { b 1; c (2 3); } d 4;"
+    expected = {"a": {"b": "1", "c": ["2", "3"]}}
+    actual = parse(input, select=["a", "a/b"])
+    assert actual == expected
+
+
+def test_deep_nesting():
+    """Nesting deeper than Python's recursion limit."""
+    depth = sys.getrecursionlimit() + 100
+    dicts = "a " + "{ a " * depth + "1;" + " }" * depth
+    lists = "b " + "(" * depth + ")" * depth + ";"
+    input = f"{dicts}\n{lists}"
+    result = parse(input)
+
+    node = result["a"]
+    for _level in range(depth):
+        node = node["a"]
+    assert node == "1"
+    node = result["b"]
+    for _level in range(depth - 1):
+        assert len(node) == 1
+        node = node[0]
+    assert node == []
+
+    node = parse(input, lazy=True)["a"]
+    for _level in range(depth):
+        node = node["a"]
+    assert node == "1"
+    node = parse(input, select=["a/" + "/".join(["a"] * depth)])["a"]
+    for _level in range(depth):
+        node = node["a"]
+    assert node == "1"
+
+
+def test_iterparse():
+    """The events of a content."""
+    input = """
+    a 1;
+    b { type fixedValue; value uniform (0 0 0); }
+    c nonuniform List<word> 2 (x "y");
+    d ( 1 { e 2; } );
+    #include "other"
+    f List<scalar> 2 (1 2);
+    """
+    events = list(iterparse(input))
+    assert events[:7] == [
+        ("entry", ("a",), "1"),
+        ("start_dict", ("b",), None),
+        ("entry", ("b", "type"), "fixedValue"),
+        ("start_list", ("b", "value"), ["uniform"]),
+        ("item", ("b", "value", 0), "0"),
+        ("item", ("b", "value", 1), "0"),
+        ("item", ("b", "value", 2), "0"),
+    ]
+    assert events[7:-1] == [
+        ("end_list", ("b", "value"), None),
+        ("end_dict", ("b",), None),
+        ("start_list", ("c",), ["nonuniform", "List<word>", "2"]),
+        ("item", ("c", 0), "x"),
+        ("item", ("c", 1), "y"),
+        ("end_list", ("c",), None),
+        ("start_list", ("d",), []),
+        ("item", ("d", 0), "1"),
+        ("start_dict", ("d", 1), None),
+        ("entry", ("d", 1, "e"), "2"),
+        ("end_dict", ("d", 1), None),
+        ("end_list", ("d",), None),
+        ("entry", ("#includes",), '"other"'),
+    ]
+    event, path, value = events[-1]
+    assert (event, path, value[:2]) == ("entry", ("f",), ["List<scalar>", "2"])
+    assert list(value[2]) == [1.0, 2.0]
+
+
+def test_iterparse_skip():
+    """Skipping dictionaries and lists."""
+    input = "a { b 1; c (1 2); } d (1 (2 3) 4); e 5;"
+    events = iterparse(input)
+    seen = []
+    for event, path, value in events:
+        seen.append((event, path, value))
+        if event in ("start_dict", "start_list") and path != ("d",):
+            assert events.send(True) is None
+
+    assert seen == [
+        ("start_dict", ("a",), None),
+        ("start_list", ("d",), []),
+        ("item", ("d", 0), "1"),
+        ("start_list", ("d", 1), None),
+        ("item", ("d", 2), "4"),
+        ("end_list", ("d",), None),
+        ("entry", ("e",), "5"),
+    ]
+
+
+def test_iterparse_file(tmp_path):
+    """The events of a file match its parsed result."""
+    path = tmp_path / "U"
+    path.write_bytes(
+        b"FoamFile { format ascii; class volVectorField; }\n"
+        b"internalField nonuniform List<vector> 2 ((1 2 3) (4 5 6));\n"
+        b"boundaryField { inlet { type fixedValue; } }\n"
+    )
+    events = list(iterparse_file(str(path)))
+    assert ("entry", ("boundaryField", "inlet", "type"), "fixedValue") in events
+    before = ["nonuniform", "List<vector>", "2"]
+    assert ("start_list", ("internalField",), before) in events
+    assert ("item", ("internalField", 1, 2), "6") in events
+
+    try:
+        list(iterparse("a 1; )"))
+    except exceptions.UnexpectedTokenError:
+        pass
+    else:
+        raise Exception("Broken content shouldn't be parsed")
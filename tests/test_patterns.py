@@ -0,0 +1,78 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import parse
+from foamparser.patterns import PatternDict
+
+
+def test_lookup():
+    """Checks if names are found by literal keys first, then by patterns."""
+    input = """
+solvers
+{
+    p { solver GAMG; }
+    "(U|k|epsilon)" { solver smoothSolver; }
+    "(U|k|epsilon)Final" { solver PBiCGStab; }
+    ".*Final" { solver PCG; }
+    UFinal { solver direct; }
+}
+"""
+    solvers = PatternDict(parse(input))["solvers"]
+    assert solvers["p"]["solver"] == "GAMG"
+    assert solvers["k"]["solver"] == "smoothSolver"
+    # the last pattern wins
+    assert solvers["kFinal"]["solver"] == "PCG"
+    assert solvers["pFinal"]["solver"] == "PCG"
+    assert solvers["UFinal"]["solver"] == "direct"
+    assert solvers.key("epsilonFinal") == ".*Final"
+    assert "T" not in solvers
+    assert list(solvers) == [
+        "p",
+        "(U|k|epsilon)",
+        "(U|k|epsilon)Final",
+        ".*Final",
+        "UFinal",
+    ]
+
+
+def test_full_match():
+    """Checks if patterns must match the whole name."""
+    entries = PatternDict({".*Wall": "1", "U.orig": "2", "[bad": "3"})
+    assert entries["leftWall"] == "1"
+    assert "leftWalls" not in entries
+    assert "U_orig" not in entries
+    assert entries["[bad"] == "3"
+
+
+def test_inline_flags():
+    """Checks if case insensitive keys only apply to their own pattern."""
+    entries = PatternDict(parse('"(?i)wall.*" 1; "inlet.*" 2; "(?i)out" 3;'))
+    assert entries["WallTop"] == "1"
+    assert entries["wall"] == "1"
+    assert entries["inletA"] == "2"
+    assert "InletA" not in entries
+    assert entries["OUT"] == "3"
+
+
+def test_backreferences():
+    """Checks if patterns with backreferences match like on their own, in
+    their place."""
+    entries = PatternDict(
+        {"(.*)": "3", "(a)b\\1": "1", "(x)(y)\\2": "2", "(?P<n>z)(?P=n)": "4"}
+    )
+    assert entries["aba"] == "1"
+    assert entries["xyy"] == "2"
+    assert entries["zz"] == "4"
+    assert entries["abb"] == "3"
+    assert entries.key("xyy") == "(x)(y)\\2"
+    # the last pattern wins
+    assert PatternDict({"(a)b\\1": "1", ".*": "2"})["aba"] == "2"
+
+
+def test_same_group_names():
+    """Checks if patterns with the same group names are still matched."""
+    entries = PatternDict({"(?P<n>a)b": "1", "(?P<n>c)d": "2"})
+    assert entries["ab"] == "1"
+    assert entries["cd"] == "2"
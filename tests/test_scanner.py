@@ -0,0 +1,85 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import exceptions
+from foamparser import scanner
+
+
+def test_tokens():
+    """Checks if the scanner produces the type and the span of each token."""
+    input = 'a (1 "two");'
+    expected = [
+        (scanner.IDENTIFIER, 0, 1),
+        (scanner.LIST_START, 2, 3),
+        (scanner.IDENTIFIER, 3, 4),
+        (scanner.QUOTED_STRING, 5, 10),
+        (scanner.LIST_END, 10, 11),
+        (scanner.END, 11, 12),
+    ]
+    actual = list(scanner.scan(input))
+    assert actual == expected
+
+
+def test_comments_are_skipped():
+    """Checks if comments never reach the consumer."""
+    input = "/* one */ a // two\n/* three */;"
+    expected = [(scanner.IDENTIFIER, 10, 11), (scanner.END, 30, 31)]
+    actual = list(scanner.scan(input))
+    assert actual == expected
+
+
+def test_comments():
+    """Checks if comments are given when asked for."""
+    input = "/* one */ a // two\n/* three */;\n// four"
+    expected = [
+        (scanner.COMMENT, 0, 9),
+        (scanner.IDENTIFIER, 10, 11),
+        (scanner.COMMENT, 12, 18),
+        (scanner.COMMENT, 19, 30),
+        (scanner.END, 30, 31),
+        (scanner.COMMENT, 32, 39),
+    ]
+    actual = list(scanner.scan(input, comments=True))
+    assert actual == expected
+
+
+def test_jump():
+    """Checks if the consumer can make the scanner skip a region."""
+    input = "a ( ignore all of this ) b;"
+    tokens = scanner.scan(input)
+    assert next(tokens) == (scanner.IDENTIFIER, 0, 1)
+    assert next(tokens) == (scanner.LIST_START, 2, 3)
+    assert tokens.send(input.index(")") + 1) is None
+    assert list(tokens) == [(scanner.IDENTIFIER, 25, 26), (scanner.END, 26, 27)]
+
+
+def test_unterminated_string():
+    """Checks if an unterminated quoted string is reported where it starts."""
+    try:
+        list(scanner.scan('a "never closed;'))
+    except exceptions.UnexpectedCharacterError as exc:
+        assert exc.position == 2
+        return
+    raise Exception
+
+
+def test_include_directives():
+    """Checks if every kind of include is a single token."""
+    input = '#include "a" #includeEtc "b"'
+    expected = [
+        (scanner.INCLUDE, 0, 8),
+        (scanner.QUOTED_STRING, 9, 12),
+        (scanner.INCLUDE, 13, 24),
+        (scanner.QUOTED_STRING, 25, 28),
+    ]
+    actual = list(scanner.scan(input))
+    assert actual == expected
+
+
+def test_variables():
+    """Checks if variable references are identifiers."""
+    input = "a $b ${..c/d} $:e.f;"
+    actual = [input[start:end] for kind, start, end in scanner.scan(input)]
+    assert actual == ["a", "$b", "${..c/d}", "$:e.f", ";"]
@@ -0,0 +1,67 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import exceptions
+from foamparser import parse
+from foamparser.variables import expand
+
+
+def test_expand():
+    """Checks if references are replaced by what they refer to."""
+    input = """
+U0 (1 0 0);
+internalField uniform $U0;
+solvers
+{
+    p { solver GAMG; tolerance 1e-6; }
+    pFinal { $p; tolerance 0; }
+    q { x $...U0; y $:solvers.p.solver; z ${/solvers/p/tolerance}; }
+}
+boundaryField
+{
+    defaults { type fixedValue; value $internalField; }
+    inlet { $defaults; }
+    outlet { $:boundaryField.defaults; type zeroGradient; }
+}
+"""
+    actual = expand(parse(input))
+    assert actual["internalField"] == ["uniform", ["1", "0", "0"]]
+    assert actual["solvers"]["pFinal"] == {"solver": "GAMG", "tolerance": "0"}
+    assert actual["solvers"]["q"] == {
+        "x": ["1", "0", "0"],
+        "y": "GAMG",
+        "z": "1e-6",
+    }
+    assert actual["boundaryField"]["inlet"] == {
+        "type": "fixedValue",
+        "value": ["uniform", ["1", "0", "0"]],
+    }
+    assert actual["boundaryField"]["outlet"]["type"] == "zeroGradient"
+    # referenced values are shared, not copied
+    assert actual["boundaryField"]["inlet"]["value"] is actual["internalField"]
+
+
+def test_expand_scopes():
+    """Checks if plain references are searched up, and dotted ones are not."""
+    input = "a 1; b { a 2; c { d $a; e $..a; f $...a; g $b/a; } }"
+    actual = expand(parse(input))
+    assert actual["b"]["c"] == {"d": "2", "e": "2", "f": "1", "g": "2"}
+
+
+def test_undefined_variable():
+    try:
+        expand(parse("a { b $c; }"))
+    except exceptions.UndefinedVariableError as exc:
+        assert exc.name == "$c"
+        return
+    raise Exception
+
+
+def test_variable_cycle():
+    try:
+        expand(parse("a $b; b $a;"))
+    except exceptions.VariableCycleError:
+        return
+    raise Exception
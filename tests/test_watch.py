@@ -0,0 +1,75 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from foamparser import watch
+
+
+def write(path, content, mtime_ns):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_diff():
+    old = {"a": "1", "b": {"c": "2", "d": ["3", "4"]}, "e": "5"}
+    new = {"a": "1", "b": {"c": "3", "d": ["3", "4"]}, "f": {"g": "6"}}
+    expected = [
+        ("changed", "b/c", "2", "3"),
+        ("removed", "e", "5", None),
+        ("added", "f", None, {"g": "6"}),
+    ]
+    assert watch.diff(old, new) == expected
+
+
+def test_poll(tmp_path):
+    """Checks if only the changed entries of the changed files are reported."""
+    control = tmp_path / "controlDict"
+    solution = tmp_path / "fvSolution"
+    write(control, "endTime 10; writeInterval 1;", 1_000_000_000)
+    write(solution, "solvers { p { tolerance 1e-6; } }", 1_000_000_000)
+    schemes = tmp_path / "fvSchemes"
+    watcher = watch.Watcher([str(control), str(solution), str(schemes)])
+    assert watcher.poll() == []
+
+    write(solution, "solvers { p { tolerance 1e-7; } }", 2_000_000_000)
+    write(schemes, "ddtSchemes { default Euler; }", 2_000_000_000)
+    changes = sorted(watcher.poll())
+    assert changes == [
+        (str(schemes), "added", "", None, {"ddtSchemes": {"default": "Euler"}}),
+        (str(solution), "changed", "solvers/p/tolerance", "1e-6", "1e-7"),
+    ]
+    assert watcher[str(solution)]["solvers"]["p"]["tolerance"] == "1e-7"
+
+    control.unlink()
+    assert watcher.poll() == [
+        (str(control), "removed", "", {"endTime": "10", "writeInterval": "1"}, None)
+    ]
+
+
+def test_poll_broken_file(tmp_path):
+    """Checks if a file that can't be parsed is tried again later."""
+    control = tmp_path / "controlDict"
+    write(control, "endTime 10;", 1_000_000_000)
+    watcher = watch.Watcher([str(control)])
+
+    write(control, "endTime 20; )", 2_000_000_000)
+    assert watcher.poll() == []
+
+    write(control, "endTime 20;", 3_000_000_000)
+    assert watcher.poll() == [(str(control), "changed", "endTime", "10", "20")]
+
+
+def test_same_arrays():
+    """Checks if arrays are compared by their values and shapes."""
+    from foamparser import parse
+
+    def field(values, kind="scalar"):
+        return parse(f"a List<{kind}> 2({values});", tensors=True)["a"][2]
+
+    assert watch.same(field("1 2"), field("1 2"))
+    assert not watch.same(field("1 2"), field("1 3"))
+    vectors = field("(1 2 3) (4 5 6)", "vector")
+    assert watch.same(vectors, field("(1 2 3) (4 5 6)", "vector"))
+    assert not watch.same(vectors, field("(1 2 3) (4 5 7)", "vector"))
+    assert not watch.same(field("1 2"), ["1", "2"])
@@ -1,10 +1,15 @@
 import sys
 import os
+import gzip
 import logging
 
+from array import array
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from foamparser import parse
 from foamparser import write
+from foamparser import write_file
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -169,3 +174,25 @@ def test_empty_dict():
     expected = "a {}"
     actual = write(input)
     assert actual == expected
+
+
+def test_array():
+    input = {"a": array("d", [1.0, 2.5])}
+    expected = "a ( 1.0 2.5 );"
+    actual = write(input)
+    assert actual == expected
+
+
+def test_write_file(tmp_path):
+    input = {"a": "1", "b": {"c": ["2", "3"]}}
+    path = tmp_path / "controlDict"
+    write_file(str(path), input)
+    assert path.read_text() == write(input)
+
+
+def test_write_compressed_file(tmp_path):
+    input = {"a": "1", "b": {"c": ["2", "3"]}}
+    path = tmp_path / "controlDict.gz"
+    write_file(str(path), input, compress=True)
+    with gzip.open(path, "rt") as infile:
+        assert parse(infile.read()) == input